@@ -1,35 +1,270 @@
-from mcp.server.fastmcp import FastMCP
-from src.get_news_list import get_news_entries_as_json
-from src.get_news_content import get_news_data
+import asyncio
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from mcp.server.fastmcp import Context, FastMCP
+from src.metrics import metrics_enabled, render_prometheus, start_metrics_file_writer, write_metrics_file
+
+# The scraping backends (Selenium, lxml, httpx, SQLite stores) are imported on
+# first use or by the background warm-up, so the server answers the MCP
+# handshake as fast as a bare FastMCP process.
+
+# Seconds to wait after startup before the background warm-up, leaving the handshake uncontended
+WARMUP_DELAY = float(os.environ.get('WSCN_WARMUP_DELAY', 0.5))
 
 mcp = FastMCP("lins_financial_news_crawler")
 
 
 @mcp.tool()
-def mcp_get_news_entries(input_time_filter: int=24) -> str:
+async def mcp_get_news_entries(input_time_filter: int=24, incremental: bool=False, channels: list[str] | None=None, dedup: bool=False) -> str:
     """
     使用 get_news_entries 函数获取新闻条目，并返回 JSON 字符串。
 
     Args:
         input_time_filter (int, 可选)：如果提供，仅返回在过去 'time_filter' 小时内发布的新闻条目。默认值为 24 小时。
+        incremental (bool, 可选)：如果为 True，仅抓取上次调用之后的新条目，并与已保存的时间窗口合并返回。默认值为 False。
+        channels (List[str], 可选)：要并发爬取的频道，如 ['global', 'china', 'us', 'forex', 'commodities']。默认仅爬取 'global'。
+        dedup (bool, 可选)：如果为 True，按标题相似度合并转载或更新标题的重复条目，保留的条目在 'Duplicates' 中列出被合并的 URL。默认值为 False。
     Returns:
-        str：包含编号，标题，URL的新闻条目 JSON 字符串。
+        str：包含编号，标题，URL的新闻条目 JSON 字符串；指定频道时按文章去重、按时间排序，并附带所属频道 'Channels'。
     """
-    return get_news_entries_as_json(time_filter=input_time_filter)
+    from src.archive import get_archive_writer
+    from src.async_news import aget_news_entries_as_json
+
+    writer = get_archive_writer('entries')
+    result = await aget_news_entries_as_json(
+        time_filter=input_time_filter, incremental=incremental, channels=channels, dedup=dedup,
+        archive_writer=writer
+    )
+    if writer is not None:
+        # 条目写入磁盘后才记为已归档，每次调用后立即写出，避免进程被终止时丢失
+        await asyncio.to_thread(writer.flush)
+    return result
 
 
 @mcp.tool()
-def mcp_get_news_content(urls_to_be_scraped: list[str]) -> list[str]:
+async def mcp_get_news_content(urls_to_be_scraped: list[str], dedup: bool=False, mode: str='full', budget: int | None=None, budget_unit: str='tokens') -> str:
     """
-    使用 mcp_get_news_content 函数从多个地址获取新闻内容，并返回对应的 JSON 字符串列表。
+    使用 aget_news_data 函数从多个地址获取新闻内容，并返回 JSON 数组字符串。
 
     Args:
         urls_to_be_scraped (List[str]): 提取内容的多个新闻目标地址列表。
+        dedup (bool, 可选)：如果为 True，内容近似重复的新闻只保留第一篇的正文，其余的 content 置空并在 duplicate_of 中给出保留文章的 id，保留的文章在 duplicates 中列出被合并文章的 id 与相似度。默认值为 False。
+        mode (str, 可选)：正文输出模式，'full' 为全文，'lead' 为开头段落，'key_sentences' 为关键句，'truncate' 为截断正文。默认值为 'full'。
+        budget (int, 可选)：整批新闻正文的总预算。设置后按 mode 压缩超出各自分配额度的正文（mode 为 'full' 时按 'truncate' 处理），较短的文章保持完整，其余额度在较长的文章间平分。未设置而 mode 不为 'full' 时，按每篇 300 计算。
+        budget_unit (str, 可选)：预算单位，'tokens'（估算）或 'chars'。默认值为 'tokens'。
+        超过 WSCN_SPILL_THRESHOLD 篇（默认 50）且未启用 dedup 与 budget 的全文请求以限制内存的方式抓取。
+    Returns:
+        str: 按输入顺序排列的新闻 JSON 数组，每篇包含 id，title，published_at，content，url，status（'ok' 或 'error'），error，duplicate_of，duplicates 及抓取耗时。
+    """
+    from src.archive import get_archive_writer
+    from src.article import encode_articles
+    from src.article_cache import get_article_cache
+    from src.async_news import aget_news_data
+    from src.condense import DEFAULT_ARTICLE_BUDGET, OUTPUT_MODES, condense_articles
+    from src.dedup import dedup_articles
+    from src.search_index import get_search_index
+    from src.spill import SPILL_THRESHOLD
+
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output mode '{mode}', expected one of {OUTPUT_MODES}")
+    if len(urls_to_be_scraped) > SPILL_THRESHOLD and not dedup and mode == 'full' and budget is None:
+        return await aget_spilled_news_content(urls_to_be_scraped)
+    articles = await aget_news_data(urls=urls_to_be_scraped, cache=get_article_cache(), search_index=get_search_index())
+    writer = get_archive_writer('articles')
+    if writer is not None:
+        await asyncio.to_thread(archive_articles, writer, articles)
+    if dedup:
+        # MinHash over every article is CPU-bound, so it runs off the event loop
+        await asyncio.to_thread(dedup_articles, articles)
+    if budget is None and mode != 'full':
+        budget = DEFAULT_ARTICLE_BUDGET * len(articles)
+    if budget is not None:
+        condense_articles(articles, budget, 'truncate' if mode == 'full' else mode, budget_unit)
+    return encode_articles(articles)
+
+
+async def aget_spilled_news_content(urls: list[str]) -> str:
+    """
+    大批量抓取时限制同时处理的文章数（WSCN_MAX_IN_FLIGHT），并将完成的文章立即写入临时文件（WSCN_SPILL_DIR），最后按输入顺序输出 JSON 数组，避免整批文章常驻内存。
+    """
+    from src.archive import get_archive_writer
+    from src.article_cache import get_article_cache
+    from src.search_index import get_search_index
+    from src.spill import aspill_news_data
+
+    with await aspill_news_data(urls, cache=get_article_cache(), search_index=get_search_index()) as spilled:
+        writer = get_archive_writer('articles')
+        if writer is not None:
+            await asyncio.to_thread(archive_spilled, writer, spilled)
+        return await asyncio.to_thread(spilled.to_json)
+
+
+def archive_articles(writer, articles):
+    """
+    归档新抓取的文章并立即写入磁盘。来自缓存的文章已在首次抓取时归档，不再重复写入，因此归档不能留在缓冲区中随进程退出而丢失。
+    """
+    writer.write_many([article for article in articles if article.ok and not article.from_cache])
+    writer.flush()
+
+
+def archive_spilled(writer, spilled, chunk_size: int=100):
+    """分批归档落盘的文章，每次只读回 chunk_size 篇，规则与 archive_articles 相同。"""
+    chunk = []
+    for article in spilled:
+        chunk.append(article)
+        if len(chunk) >= chunk_size:
+            writer.write_many([article for article in chunk if article.ok and not article.from_cache])
+            chunk = []
+    archive_articles(writer, chunk)
+
+
+@mcp.tool()
+async def mcp_stream_news_content(urls_to_be_scraped: list[str], ctx: Context) -> str:
+    """
+    与 mcp_get_news_content 相同，但每篇新闻解析完成后立即通过进度与日志通知推送，通知内容为包含输入序号 index 与 article 的 JSON。
+
+    Args:
+        urls_to_be_scraped (List[str]): 提取内容的多个新闻目标地址列表。
+    Returns:
+        str: 按输入顺序排列的新闻 JSON 数组。
+    """
+    from src.article import encode_articles
+    from src.article_cache import get_article_cache
+    from src.async_news import aiter_news_data
+    from src.search_index import get_search_index
+
+    articles = [None] * len(urls_to_be_scraped)
+    done = 0
+    async for index, article in aiter_news_data(urls_to_be_scraped, cache=get_article_cache(), search_index=get_search_index()):
+        articles[index] = article
+        done += 1
+        await ctx.info(json.dumps({"index": index, "article": article.to_dict()}, ensure_ascii=False))
+        await ctx.report_progress(done, len(urls_to_be_scraped))
+    return encode_articles(articles)
+
+
+@mcp.tool()
+async def mcp_search_news(query: str, hours: int=48, k: int=10) -> str:
+    """
+    在本地全文索引中检索已抓取过的新闻（中文按二元分词，BM25 排序），不发起任何网络请求。
+
+    Args:
+        query (str): 检索词，如 '美联储'。多个词以空格分隔时需全部命中。
+        hours (int, 可选)：仅返回在过去 'hours' 小时内发布的新闻。默认值为 48 小时。
+        k (int, 可选)：最多返回的条数。默认值为 10。
+    Returns:
+        str: 按相关度排序的 JSON 数组，每条包含 id，url，title，published_at，score 与摘要 snippet。
+    """
+    from src.search_index import get_search_index
+
+    results = await asyncio.to_thread(get_search_index().search, query, hours, k)
+    return json.dumps(results, ensure_ascii=False)
+
+
+@mcp.tool()
+async def mcp_refresh_news(urls_to_be_refreshed: list[str] | None=None, max_age_hours: float=6) -> str:
+    """
+    检查新闻是否有更新，只返回发生变化的新闻。已跟踪的新闻使用条件请求重新获取，内容未变化时不返回；有更新时只返回按段落计算的差异。
+
+    Args:
+        urls_to_be_refreshed (list[str], 可选)：需要检查的新闻 URL 列表。不指定时检查所有在 'max_age_hours' 小时内发布且已跟踪的新闻。
+        max_age_hours (float, 可选)：超过该时长（小时）的已跟踪新闻不再重新获取。默认值为 6 小时。
+    Returns:
+        str: JSON 对象，'changed' 为变化的新闻：首次出现的新闻（change 为 'new'）附带完整 content，更新的新闻（change 为 'updated'）附带版本号 version 与段落差异 diff（每段包含 at，removed，added）；另含失败列表 'failed' 及未变化数 'unchanged' 与跳过数 'skipped'。
+    """
+    from src.article_cache import get_article_cache
+    from src.change_tracker import arefresh_articles
+
+    result = await arefresh_articles(urls_to_be_refreshed, cache=get_article_cache(), max_age_hours=max_age_hours)
+    return json.dumps(result, ensure_ascii=False)
+
+
+@mcp.tool()
+def mcp_get_metrics() -> str:
+    """
+    返回各抓取阶段耗时与计数器（抓取字节数，缓存命中，重试，超时等）的 Prometheus 文本格式指标。需设置环境变量 WSCN_METRICS=1 启用。
+
     Returns:
-        List[str]: 包含标题，日期，URL的多个新闻条目 JSON 字符串列表。
+        str：Prometheus 文本格式的指标。
+    """
+    if not metrics_enabled():
+        return "Metrics are disabled, set WSCN_METRICS=1 to enable them."
+    return render_prometheus()
+
+
+def warm_up_driver_pools():
     """
-    return get_news_data(urls=urls_to_be_scraped)
+    预先启动浏览器，使首次请求无需等待 Chrome 冷启动。
+
+    通过环境变量 WSCN_DRIVER_WARMUP 设置各个浏览器池预热的数量，格式为 'listing=1,article=0'。
+    """
+    from src.driver_pool import get_driver_pool
+
+    for spec in os.environ.get('WSCN_DRIVER_WARMUP', 'listing=1').split(','):
+        kind, _, count = spec.partition('=')
+        if kind.strip() and int(count or 1) > 0:
+            try:
+                get_driver_pool(kind.strip()).warm_up(int(count or 1))
+            except Exception as e:
+                print(f"Error warming up the {kind} driver pool: {e}", file=sys.stderr)
+
+
+def start_prefetcher():
+    """
+    设置环境变量 WSCN_PREFETCH=1 时，在后台定期爬取列表并预先抓取新文章到本地缓存，使后续的内容请求直接命中缓存。
+
+    频道，间隔，并发数与请求速率分别通过 WSCN_PREFETCH_CHANNELS，WSCN_PREFETCH_INTERVAL，WSCN_PREFETCH_CONCURRENCY，WSCN_PREFETCH_RATE 配置。
+    """
+    from src.archive import get_archive_writer
+    from src.article_cache import get_article_cache
+    from src.prefetcher import Prefetcher, prefetch_enabled
+    from src.search_index import get_search_index
+
+    if not prefetch_enabled():
+        return None
+    return Prefetcher(cache=get_article_cache(), search_index=get_search_index(), archive_writer=get_archive_writer('articles')).start()
+
+
+_prefetcher = None
+
+
+def warm_up():
+    """
+    在握手完成后于后台导入抓取后端，然后预热浏览器池并按需启动预抓取，使首次工具调用无需等待导入。
+    """
+    global _prefetcher
+    time.sleep(WARMUP_DELAY)
+    try:
+        import src.async_news  # noqa: F401 - imports the listing and content scrapers
+        import src.condense  # noqa: F401
+        import src.archive  # noqa: F401
+    except Exception as e:
+        print(f"Error importing the scraping backends: {e}", file=sys.stderr)
+        return
+    warm_up_driver_pools()
+    _prefetcher = start_prefetcher()
+
+
+def shutdown_backends():
+    """退出时关闭已加载的后端。尚未导入的后端没有需要释放的资源，因此不会为此导入它们。"""
+    if _prefetcher is not None:
+        _prefetcher.stop(timeout=5)
+    if 'src.driver_pool' in sys.modules:
+        sys.modules['src.driver_pool'].shutdown_driver_pools()
+    if 'src.archive' in sys.modules:
+        sys.modules['src.archive'].close_archive_writers()
 
 
 if __name__ == "__main__":
-    mcp.run(transport="stdio")
+    atexit.register(shutdown_backends)
+    atexit.register(write_metrics_file)
+    start_metrics_file_writer()
+    threading.Thread(target=warm_up, name='backend-warm-up', daemon=True).start()
+    try:
+        mcp.run(transport="stdio")
+    finally:
+        shutdown_backends()
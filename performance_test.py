@@ -1,118 +1,292 @@
 #!/usr/bin/env python3
 """
-Performance comparison script for the optimized wallstreetcn scraper
+Offline benchmark suite for the wallstreetcn scraper.
+
+Serves recorded listing pages, article pages and feed JSON from a local
+stand-in (src/fixture_server.py) with configurable latency and jitter, then
+measures the listing engines and the content scrapers across batch sizes and
+worker counts, along with the time from launching the MCP server to its reply
+to the 'initialize' handshake. Results are written as JSON; cases are checked
+against the regression thresholds in performance_thresholds.json and the
+script exits with status 1 if any is exceeded.
+
+Usage:
+    uv run python performance_test.py --output bench_output.txt
+    uv run python performance_test.py --browser   # also benchmark the Chrome paths
 """
 
-import time
+import argparse
+import asyncio
+import fnmatch
+import json
+import math
+import os
+import subprocess
 import sys
-from src.get_news_list import get_news_entries_as_json
+import time
+from types import SimpleNamespace
+
+from src.fixture_server import FEED_PATH, start_fixture_server
+from src.get_news_list import get_news_entries, get_news_entries_from_feed
 from src.get_news_content import get_news_data, get_news_data_sequential
+from src.async_news import aget_news_data
+from src.driver_pool import shutdown_driver_pools
+from src.fetch_scheduler import FetchScheduler, set_fetch_scheduler
+from src.metrics import peak_rss_bytes
+from src.spill import spill_news_data
+
+
+DEFAULT_THRESHOLDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'performance_thresholds.json')
+
+# First MCP request of a session; the server's reply ends the handshake
+INITIALIZE_REQUEST = json.dumps({
+    "jsonrpc": "2.0", "id": 1, "method": "initialize",
+    "params": {"protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "bench", "version": "0"}},
+})
+
+# Reference point for the server's startup: a FastMCP server with nothing registered
+BARE_FASTMCP = "from mcp.server.fastmcp import FastMCP; FastMCP('bare').run(transport='stdio')"
+
+# Article IDs requested from the stand-in, which serves the recorded article for any ID
+FIRST_ARTICLE_ID = 3727050
+
 
-def test_news_list_performance():
-    """Test the performance of news list scraping"""
-    print("=" * 60)
-    print("TESTING NEWS LIST SCRAPING PERFORMANCE")
-    print("=" * 60)
-    
-    # Test with different time filters
-    time_filters = [2, 6, 12, 24]
-    
-    for time_filter in time_filters:
-        print(f"\nTesting with time_filter={time_filter} hours:")
-        start_time = time.time()
-        
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process, in MB"""
+    return peak_rss_bytes() / (1024 * 1024)
+
+
+def browser_process_count():
+    """Number of running Chrome/chromedriver processes, or None where /proc is unavailable"""
+    if not os.path.isdir('/proc'):
+        return None
+    count = 0
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
         try:
-            result = get_news_entries_as_json(time_filter=time_filter)
-            end_time = time.time()
-            duration = end_time - start_time
-            
-            # Count number of articles
-            import json
-            news_data = json.loads(result)
-            article_count = len(news_data) if isinstance(news_data, list) else 0
-            
-            print(f"  ✓ Found {article_count} articles in {duration:.2f} seconds")
-            print(f"  ✓ Rate: {article_count/duration:.1f} articles/second")
-            
-        except Exception as e:
-            print(f"  ✗ Error: {str(e)}")
-
-def test_content_scraping_performance():
-    """Test the performance of content scraping"""
-    print("\n" + "=" * 60)
-    print("TESTING CONTENT SCRAPING PERFORMANCE")
-    print("=" * 60)
-    
-    # Sample URLs for testing
-    test_urls = [
-        "https://wallstreetcn.com/articles/3747562",
-        "https://wallstreetcn.com/articles/3747573", 
-        "https://wallstreetcn.com/articles/3747570"
-    ]
-    
-    print(f"\nTesting with {len(test_urls)} URLs:")
-    for i, url in enumerate(test_urls, 1):
-        print(f"  {i}. {url}")
-    
-    # Test concurrent version
-    print("\n--- Concurrent Processing ---")
-    start_time = time.time()
-    try:
-        concurrent_results = get_news_data(test_urls, max_workers=3)
-        concurrent_time = time.time() - start_time
-        concurrent_success = len([r for r in concurrent_results if not r.startswith("Error")])
-        
-        print(f"  ✓ Concurrent: {concurrent_success}/{len(test_urls)} articles in {concurrent_time:.2f} seconds")
-        print(f"  ✓ Rate: {concurrent_success/concurrent_time:.1f} articles/second")
-    except Exception as e:
-        print(f"  ✗ Concurrent Error: {str(e)}")
-        concurrent_time = float('inf')
-    
-    # Test sequential version for comparison
-    print("\n--- Sequential Processing ---")
-    start_time = time.time()
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                cmdline = f.read()
+        except OSError:
+            continue
+        if b'chrome' in cmdline.split(b'\0')[0].lower():
+            count += 1
+    return count
+
+
+def handshake(command):
+    """
+    Start an MCP stdio server and time it up to its reply to 'initialize'
+
+    Returns a one-item list for run_case; the item is not ok if the server
+    exited or answered with an error.
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    # No browser warm-up or prefetching, so only the startup path itself is measured
+    env = {**os.environ, 'WSCN_DRIVER_WARMUP': '', 'WSCN_PREFETCH': ''}
+    process = subprocess.Popen(
+        command, cwd=root, env=env, text=True,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
     try:
-        sequential_results = get_news_data_sequential(test_urls)
-        sequential_time = time.time() - start_time
-        sequential_success = len([r for r in sequential_results if not r.startswith("Error")])
-        
-        print(f"  ✓ Sequential: {sequential_success}/{len(test_urls)} articles in {sequential_time:.2f} seconds")
-        print(f"  ✓ Rate: {sequential_success/sequential_time:.1f} articles/second")
-        
-        # Calculate improvement
-        if concurrent_time != float('inf') and sequential_time > 0:
-            improvement = (sequential_time - concurrent_time) / sequential_time * 100
-            speedup = sequential_time / concurrent_time
-            print(f"\n  🚀 Performance Improvement:")
-            print(f"     • {improvement:.1f}% faster")
-            print(f"     • {speedup:.1f}x speedup")
-    except Exception as e:
-        print(f"  ✗ Sequential Error: {str(e)}")
+        process.stdin.write(INITIALIZE_REQUEST + '\n')
+        process.stdin.flush()
+        line = process.stdout.readline()
+    finally:
+        process.kill()
+        process.wait()
+    ok = bool(line) and 'result' in json.loads(line)
+    return [SimpleNamespace(ok=ok)]
+
+
+def spilled_articles(urls):
+    """Memory-bounded batch, read back from disk and encoded as the MCP tool would"""
+    with spill_news_data(urls) as spilled:
+        spilled.to_json()
+        return list(spilled)
+
+
+def run_case(name, func, repeats):
+    """
+    Run one benchmark case 'repeats' times
+
+    func() must return the list of items it produced; an item counts as a
+    success unless it has a false 'ok' attribute.
+    """
+    latencies = []
+    items = successes = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        produced = func()
+        latencies.append(time.perf_counter() - started)
+        items += len(produced)
+        successes += sum(1 for item in produced if getattr(item, 'ok', True))
+
+    p50 = percentile(latencies, 0.5)
+    result = {
+        "name": name,
+        "repeats": repeats,
+        "items_per_run": items // repeats,
+        "p50_ms": round(p50 * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "mean_ms": round(sum(latencies) / repeats * 1000, 2),
+        "throughput_per_s": round(items / repeats / p50, 2) if p50 > 0 else None,
+        "success_rate": round(successes / items, 4) if items else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "browser_processes": browser_process_count(),
+    }
+    print(f"  {name}: p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, "
+          f"{result['throughput_per_s']} items/s", file=sys.stderr)
+    return result
+
+
+def load_thresholds(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def check_thresholds(results, thresholds):
+    """
+    Compare results with thresholds of the form {"<case glob>": {"max_p95_ms": ...}}
+
+    Supported keys: max_p50_ms, max_p95_ms, min_throughput_per_s,
+    min_success_rate, max_peak_rss_mb, max_browser_processes.
+    When several patterns set the same key for a case, the most specific one
+    (with the most literal characters) wins, so "*" only supplies defaults.
+    """
+    regressions = []
+    for result in results:
+        matching = [pattern for pattern in thresholds if fnmatch.fnmatch(result["name"], pattern)]
+        limits = {}
+        for pattern in sorted(matching, key=pattern_specificity):
+            limits.update(thresholds[pattern])
+        for key, limit in limits.items():
+            bound, _, metric = key.partition('_')
+            value = result.get(metric)
+            if value is None:
+                continue
+            if (bound == 'max' and value > limit) or (bound == 'min' and value < limit):
+                regressions.append({"name": result["name"], "metric": metric, "value": value, "limit": limit})
+    return regressions
+
+
+def pattern_specificity(pattern):
+    """Number of literal characters in a case glob"""
+    return len(pattern) - sum(pattern.count(char) for char in '*?[]')
+
 
 def main():
-    """Run all performance tests"""
-    print("WALLSTREETCN SCRAPER PERFORMANCE TEST")
-    print("=" * 60)
-    print("Testing optimized scraper performance...")
-    
-    # Test news list scraping
-    test_news_list_performance()
-    
-    # Test content scraping
-    test_content_scraping_performance()
-    
-    print("\n" + "=" * 60)
-    print("OPTIMIZATION SUMMARY")
-    print("=" * 60)
-    print("Key optimizations implemented:")
-    print("• Reduced WebDriver creation overhead")
-    print("• Concurrent content scraping (3x faster typical)")
-    print("• Optimized Chrome options (disabled images, CSS, JS)")
-    print("• Reduced wait times and timeouts")
-    print("• More efficient element selection")
-    print("• Pre-compiled regex patterns")
-    print("• Improved scrolling logic")
-    print("• Thread-local WebDriver instances")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-sizes', default='1,5,20', help='comma-separated article batch sizes')
+    parser.add_argument('--workers', default='1,3,5', help='comma-separated max_workers values for get_news_data')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=50, help='base latency of the stand-in per request')
+    parser.add_argument('--jitter-ms', type=float, default=20, help='uniform random jitter added to the latency')
+    parser.add_argument('--time-filter', type=int, default=24)
+    parser.add_argument('--rate', type=float, default=100.0, help='per-host requests/s allowed by the fetch scheduler (0 disables limiting)')
+    parser.add_argument('--async-rate', type=float, default=100.0, help='per-host requests/s cap for aget_news_data batches, only tightening --rate')
+    parser.add_argument('--browser', action='store_true', help='also benchmark the Chrome listing and selenium backend')
+    parser.add_argument('--skip-startup', action='store_true', help='skip the MCP server handshake benchmark')
+    parser.add_argument('--thresholds', default=DEFAULT_THRESHOLDS, help='regression thresholds JSON file')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    batch_sizes = [int(n) for n in args.batch_sizes.split(',')]
+    worker_counts = [int(n) for n in args.workers.split(',')]
+
+    set_fetch_scheduler(FetchScheduler(rate=args.rate, burst=max(1, int(args.rate))))
+    server, base_url = start_fixture_server(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    listing_url = f"{base_url}/news/global"
+    print(f"Benchmarking against fixture server at {base_url}", file=sys.stderr)
+
+    results = []
+    try:
+        if not args.skip_startup:
+            results.append(run_case("startup/bare_fastmcp", lambda: handshake([sys.executable, '-c', BARE_FASTMCP]), args.repeats))
+            results.append(run_case("startup/server", lambda: handshake([sys.executable, 'main.py']), args.repeats))
+        results.append(run_case(
+            "listing/feed",
+            lambda: get_news_entries_from_feed(listing_url, args.time_filter, api_url=base_url + FEED_PATH),
+            args.repeats
+        ))
+        if args.browser:
+            results.append(run_case(
+                "listing/browser",
+                lambda: get_news_entries(listing_url, args.time_filter),
+                args.repeats
+            ))
+            # Pooled Chromes would otherwise outlive the case and count against the browser-free ones
+            shutdown_driver_pools()
+
+        backends = ['http', 'selenium'] if args.browser else ['http']
+        for batch_size in batch_sizes:
+            urls = [f"{base_url}/articles/{FIRST_ARTICLE_ID - i}" for i in range(batch_size)]
+            for backend in backends:
+                for workers in worker_counts:
+                    results.append(run_case(
+                        f"content/concurrent/{backend}/b{batch_size}/w{workers}",
+                        lambda: get_news_data(urls, max_workers=workers, backend=backend),
+                        args.repeats
+                    ))
+                results.append(run_case(
+                    f"content/sequential/{backend}/b{batch_size}",
+                    lambda: get_news_data_sequential(urls, backend=backend),
+                    args.repeats
+                ))
+                if backend == 'selenium':
+                    shutdown_driver_pools()
+            results.append(run_case(
+                f"content/spill/http/b{batch_size}",
+                lambda: spilled_articles(urls),
+                args.repeats
+            ))
+            results.append(run_case(
+                f"content/async/http/b{batch_size}",
+                lambda: asyncio.run(aget_news_data(urls, rate=args.async_rate)),
+                args.repeats
+            ))
+    finally:
+        shutdown_driver_pools()
+        server.shutdown()
+
+    regressions = check_thresholds(results, load_thresholds(args.thresholds))
+    report = {
+        "config": {
+            "batch_sizes": batch_sizes,
+            "workers": worker_counts,
+            "repeats": args.repeats,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "time_filter": args.time_filter,
+            "rate": args.rate,
+            "async_rate": args.async_rate,
+            "browser": args.browser,
+            "startup": not args.skip_startup,
+        },
+        "results": results,
+        "regressions": regressions,
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    for regression in regressions:
+        print(f"REGRESSION {regression['name']}: {regression['metric']} = {regression['value']} "
+              f"(limit {regression['limit']})", file=sys.stderr)
+    return 1 if regressions else 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
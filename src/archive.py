@@ -0,0 +1,321 @@
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Iterable, Iterator, List
+
+from src.article import CST, Article
+from src.article_cache import article_id_from_url
+from src.listing_index import ListingIndex, get_listing_index
+from src.metrics import incr, span
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional, install with the 'parquet' extra
+    pa = pq = None
+
+
+ARCHIVE_FORMATS = ('jsonl', 'parquet')
+ARCHIVE_KINDS = ('articles', 'entries')
+
+# Records without a usable publish time land in this partition
+UNKNOWN_DATE = 'unknown'
+
+# Parquet rows buffered per partition before a part file is written
+DEFAULT_ROW_GROUP = 1000
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed, install the 'parquet' extra")
+
+
+def _schemas():
+    return {
+        'articles': pa.schema([
+            ('id', pa.string()),
+            ('url', pa.string()),
+            ('title', pa.string()),
+            ('published_at', pa.string()),
+            ('content', pa.string()),
+            ('status', pa.string()),
+            ('error', pa.string()),
+            ('fetch_ms', pa.float64()),
+            ('parse_ms', pa.float64()),
+            ('from_cache', pa.bool_()),
+            ('duplicate_of', pa.string()),
+            # Stage timings are sparse and free-form, so they are kept as JSON
+            ('timings', pa.string()),
+        ]),
+        'entries': pa.schema([
+            ('id', pa.string()),
+            ('title', pa.string()),
+            ('url', pa.string()),
+            ('published_at', pa.string()),
+            ('channels', pa.list_(pa.string())),
+        ]),
+    }
+
+
+def article_record(article: Article) -> dict:
+    """Flat archive record of an article"""
+    record = article.to_dict()
+    # Clusters describe one dedup'd response, not the article
+    del record["duplicates"]
+    record["timings"] = json.dumps(record["timings"], separators=(',', ':')) if record["timings"] else None
+    return record
+
+
+def entry_record(entry: dict) -> dict:
+    """Flat archive record of a listing entry ('ID', 'Title', 'URL', 'Time', 'Channels')"""
+    return {
+        "id": article_id_from_url(entry["URL"]),
+        "title": entry.get("Title", ""),
+        "url": entry["URL"],
+        "published_at": entry.get("Time") or "",
+        "channels": list(entry.get("Channels") or []),
+    }
+
+
+def partition_date(published_at: str) -> str:
+    """Publish date in Beijing time (YYYY-MM-DD), the site's own calendar"""
+    try:
+        published = datetime.fromisoformat(published_at)
+    except (TypeError, ValueError):
+        return UNKNOWN_DATE
+    if published.tzinfo is not None:
+        published = published.astimezone(CST)
+    return published.date().isoformat()
+
+
+def partition_dir(root: str, kind: str, date: str) -> str:
+    return os.path.join(root, kind, f'date={date}')
+
+
+class ArchiveWriter:
+    """
+    Append-only archive of articles or listing entries, partitioned by publish date.
+
+    Layout: <root>/<kind>/date=YYYY-MM-DD/. JSONL records are streamed to one
+    file per partition as they are written; Parquet records are buffered per
+    partition and flushed as new part files, so appending never rewrites
+    existing data and memory stays bounded by 'row_group_size' rows per partition.
+    """
+
+    def __init__(self, root: str, kind: str = 'articles', format: str = 'jsonl', row_group_size: int = DEFAULT_ROW_GROUP):
+        if kind not in ARCHIVE_KINDS:
+            raise ValueError(f"Unknown archive kind '{kind}', expected one of {ARCHIVE_KINDS}")
+        if format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unknown archive format '{format}', expected one of {ARCHIVE_FORMATS}")
+        if format == 'parquet':
+            _require_pyarrow()
+            self._schema = _schemas()[kind]
+        self.root = root
+        self.kind = kind
+        self.format = format
+        self.row_group_size = row_group_size
+        self.written = 0
+        self._buffers = {}
+        self._lock = threading.Lock()
+        # New listing entries not yet on disk, recorded in the listing index once their partition is written
+        self._unmarked = {}
+        self._unmarked_ids = set()
+        self._marks_lock = threading.Lock()
+
+    def write(self, item):
+        """Append one Article (kind 'articles') or listing entry dict (kind 'entries')"""
+        self.write_many([item])
+
+    def write_many(self, items: Iterable):
+        """Append several records, grouped by partition"""
+        by_date = {}
+        for item in items:
+            record = article_record(item) if self.kind == 'articles' else entry_record(item)
+            by_date.setdefault(partition_date(record["published_at"]), []).append(record)
+
+        with span('archive'), self._lock:
+            for date, records in by_date.items():
+                if self.format == 'jsonl':
+                    self._append_jsonl(date, records)
+                    self._mark_archived(date)
+                else:
+                    buffer = self._buffers.setdefault(date, [])
+                    buffer.extend(records)
+                    if len(buffer) >= self.row_group_size:
+                        self._flush_partition(date)
+                self.written += len(records)
+        incr('archived_records', sum(len(records) for records in by_date.values()))
+
+    def write_new_entries(self, entries: list, index: ListingIndex = None) -> list:
+        """
+        Append only the listing entries this archive has not seen, so polling the
+        same window does not grow it. Entries are remembered in the listing index
+        under the archive's root, without age pruning, once they are on disk (for
+        Parquet, when their partition is flushed)
+
+        Returns:
+            list: the entries that were appended
+        """
+        if self.kind != 'entries':
+            raise ValueError("write_new_entries needs an 'entries' archive")
+        index = index if index is not None else get_listing_index()
+        with self._marks_lock:
+            entries = [
+                entry for entry in index.unseen(self._index_key, entries)
+                if article_id_from_url(entry["URL"]) not in self._unmarked_ids
+            ]
+            for entry in entries:
+                date = partition_date(entry_record(entry)["published_at"])
+                self._unmarked.setdefault(date, []).append((index, entry))
+                self._unmarked_ids.add(article_id_from_url(entry["URL"]))
+        self.write_many(entries)
+        return entries
+
+    @property
+    def _index_key(self):
+        return f'archive:{os.path.abspath(self.root)}'
+
+    def _mark_archived(self, date):
+        """Record the new entries of a partition that was just written in their listing index"""
+        with self._marks_lock:
+            pending = self._unmarked.pop(date, [])
+            for _, entry in pending:
+                self._unmarked_ids.discard(article_id_from_url(entry["URL"]))
+        by_index = {}
+        for index, entry in pending:
+            by_index.setdefault(id(index), (index, []))[1].append(entry)
+        for index, entries in by_index.values():
+            index.merge(self._index_key, entries, prune=False)
+
+    def _append_jsonl(self, date, records):
+        directory = partition_dir(self.root, self.kind, date)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'part.jsonl'), 'a', encoding='utf-8') as f:
+            f.writelines(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n' for record in records)
+
+    def _flush_partition(self, date):
+        records = self._buffers.pop(date, None)
+        if not records:
+            return
+        directory = partition_dir(self.root, self.kind, date)
+        os.makedirs(directory, exist_ok=True)
+        # Part files are named so that a directory listing sorts them by write time
+        path = os.path.join(directory, f'part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet')
+        table = pa.Table.from_pylist(records, schema=self._schema)
+        tmp_path = path + '.tmp'
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+        self._mark_archived(date)
+
+    def flush(self):
+        """Write out every buffered Parquet partition"""
+        with self._lock:
+            for date in list(self._buffers):
+                self._flush_partition(date)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def archive_partitions(root: str, kind: str = 'articles') -> List[str]:
+    """Dates with archived data, oldest first"""
+    return sorted(
+        os.path.basename(path).partition('=')[2]
+        for path in glob.glob(os.path.join(root, kind, 'date=*'))
+    )
+
+
+def _partition_files(root, kind, format, start_date, end_date):
+    pattern = 'part.jsonl' if format == 'jsonl' else 'part-*.parquet'
+    files = []
+    for date in archive_partitions(root, kind):
+        if date != UNKNOWN_DATE and ((start_date and date < start_date) or (end_date and date > end_date)):
+            continue
+        if date == UNKNOWN_DATE and (start_date or end_date):
+            continue
+        files.extend(sorted(glob.glob(os.path.join(partition_dir(root, kind, date), pattern))))
+    return files
+
+
+def read_archive(root: str, kind: str = 'articles', start_date: str = None, end_date: str = None, columns: List[str] = None):
+    """
+    Read the Parquet archive into one pyarrow Table, memory-mapping the part files
+
+    Args:
+        root (str): Archive root directory
+        kind (str): 'articles' or 'entries'
+        start_date (str): First publish date to include (YYYY-MM-DD)
+        end_date (str): Last publish date to include (YYYY-MM-DD)
+        columns (List[str]): Columns to read, default all
+    """
+    _require_pyarrow()
+    schema = _schemas()[kind]
+    tables = [
+        pq.read_table(path, columns=columns, memory_map=True)
+        for path in _partition_files(root, kind, 'parquet', start_date, end_date)
+    ]
+    if not tables:
+        return schema.empty_table() if columns is None else pa.schema([schema.field(c) for c in columns]).empty_table()
+    return pa.concat_tables(tables)
+
+
+def iter_archive(root: str, kind: str = 'articles', format: str = 'jsonl', start_date: str = None, end_date: str = None) -> Iterator[dict]:
+    """Stream archived records one at a time, oldest partition first"""
+    if format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unknown archive format '{format}', expected one of {ARCHIVE_FORMATS}")
+    for path in _partition_files(root, kind, format, start_date, end_date):
+        if format == 'jsonl':
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        else:
+            _require_pyarrow()
+            for batch in pq.ParquetFile(path, memory_map=True).iter_batches():
+                yield from batch.to_pylist()
+
+
+def iter_archived_articles(root: str, format: str = 'jsonl', start_date: str = None, end_date: str = None) -> Iterator[Article]:
+    """Stream archived articles back as Article records"""
+    for record in iter_archive(root, 'articles', format, start_date, end_date):
+        if record.get("timings"):
+            record["timings"] = json.loads(record["timings"])
+        yield Article.from_dict(record)
+
+
+# Process-wide writers configured through the environment, created on first use
+ARCHIVE_DIR = os.environ.get('WSCN_ARCHIVE_DIR')
+ARCHIVE_FORMAT = os.environ.get('WSCN_ARCHIVE_FORMAT', 'jsonl')
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_archive_writer(kind: str = 'articles'):
+    """Get the process-wide archive writer for 'kind', or None unless WSCN_ARCHIVE_DIR is set"""
+    if not ARCHIVE_DIR:
+        return None
+    with _writers_lock:
+        writer = _writers.get(kind)
+        if writer is None:
+            writer = _writers[kind] = ArchiveWriter(ARCHIVE_DIR, kind, ARCHIVE_FORMAT)
+        return writer
+
+
+def close_archive_writers():
+    """Flush every process-wide archive writer, e.g. when the MCP server exits"""
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.close()
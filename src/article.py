@@ -0,0 +1,109 @@
+import json
+from datetime import timedelta, timezone
+from dataclasses import dataclass, asdict, fields
+from typing import Iterable, List, Optional
+
+try:
+    import msgpack
+except ImportError:  # Optional, install with the 'msgpack' extra
+    msgpack = None
+
+
+# Publish times on the site are shown in Beijing time
+CST = timezone(timedelta(hours=8))
+
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+
+
+@dataclass(slots=True)
+class Article:
+    """
+    Scraped article record returned by the library API and the MCP tools.
+
+    Failed scrapes are records too, with status 'error' and the reason in 'error',
+    so consumers never have to parse free-form strings.
+    """
+    id: str
+    url: str
+    title: str = ""
+    published_at: str = ""
+    content: str = ""
+    status: str = STATUS_OK
+    error: str = ""
+    fetch_ms: float = 0.0
+    parse_ms: float = 0.0
+    from_cache: bool = False
+    # ID of the article this one near-duplicates, set by dedup_articles (content is then dropped)
+    duplicate_of: str = ""
+    # Near-duplicates folded into this article by dedup_articles, as {"id", "similarity"}
+    duplicates: Optional[list] = None
+    # Per-stage timings in ms, only collected while metrics are enabled
+    timings: Optional[dict] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+    @classmethod
+    def failed(cls, id: str, url: str, error) -> 'Article':
+        return cls(id=id, url=url, status=STATUS_ERROR, error=str(error))
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(',', ':'))
+
+    def to_msgpack(self) -> bytes:
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed, install the 'msgpack' extra")
+        return msgpack.packb(self.to_dict(), use_bin_type=True)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Article':
+        return cls(**{name: data[name] for name in _FIELD_NAMES if name in data})
+
+    @classmethod
+    def from_json(cls, payload: str) -> 'Article':
+        return cls.from_dict(json.loads(payload))
+
+    @classmethod
+    def from_msgpack(cls, payload: bytes) -> 'Article':
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed, install the 'msgpack' extra")
+        return cls.from_dict(msgpack.unpackb(payload, raw=False))
+
+
+_FIELD_NAMES = tuple(field.name for field in fields(Article))
+
+
+def encode_articles(articles: Iterable[Article], format: str = 'json'):
+    """
+    Encode a batch of articles in one pass
+
+    Args:
+        articles (Iterable[Article]): Articles to encode
+        format (str): 'json' for a compact JSON array (str), 'msgpack' for a msgpack array (bytes)
+    """
+    records = [article.to_dict() for article in articles]
+    if format == 'json':
+        return json.dumps(records, ensure_ascii=False, separators=(',', ':'))
+    if format == 'msgpack':
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed, install the 'msgpack' extra")
+        return msgpack.packb(records, use_bin_type=True)
+    raise ValueError(f"Unknown format '{format}', expected 'json' or 'msgpack'")
+
+
+def decode_articles(payload, format: str = 'json') -> List[Article]:
+    """Decode a batch produced by encode_articles"""
+    if format == 'json':
+        records = json.loads(payload)
+    elif format == 'msgpack':
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed, install the 'msgpack' extra")
+        records = msgpack.unpackb(payload, raw=False)
+    else:
+        raise ValueError(f"Unknown format '{format}', expected 'json' or 'msgpack'")
+    return [Article.from_dict(record) for record in records]
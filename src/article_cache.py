@@ -0,0 +1,200 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+
+from src.metrics import incr
+
+
+# Default on-disk location, overridable through the environment
+DEFAULT_CACHE_PATH = os.environ.get(
+    'WSCN_CACHE_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'wallstreetcn_scrapper', 'articles.sqlite3')
+)
+
+# Articles rarely change after publication, so a day is a safe default
+DEFAULT_TTL = int(os.environ.get('WSCN_CACHE_TTL', 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.environ.get('WSCN_CACHE_MAX_ENTRIES', 5000))
+
+ARTICLE_ID_PATTERN = re.compile(r'/articles/(\d+)')
+
+
+def article_id_from_url(url: str) -> str:
+    """Return the numeric article ID of a wallstreetcn article URL, or the URL itself"""
+    match = ARTICLE_ID_PATTERN.search(url)
+    return match.group(1) if match else url
+
+
+def canonical_article_url(url: str) -> str:
+    """
+    Canonical form of an article URL, '<scheme>://<host>/articles/<id>', so that
+    query strings, fragments and trailing slashes do not make the same article
+    look like several. Other URLs are returned unchanged.
+    """
+    parts = urlsplit(url)
+    match = ARTICLE_ID_PATTERN.match(parts.path)
+    if not match or parts.path.rstrip('/') != match.group(0):
+        return url
+    return f"{parts.scheme}://{parts.netloc}/articles/{match.group(1)}"
+
+
+class ArticleCache:
+    """
+    SQLite-backed article cache keyed by article ID.
+
+    Entries younger than the TTL are served directly; stale entries keep their
+    ETag/Last-Modified validators so they can be revalidated with a conditional
+    request. The cache is bounded to max_entries, evicting least recently used
+    entries first.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS articles ('
+            ' article_id TEXT PRIMARY KEY,'
+            ' url TEXT NOT NULL,'
+            ' payload TEXT NOT NULL,'
+            ' etag TEXT,'
+            ' last_modified TEXT,'
+            ' fetched_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS articles_accessed_at ON articles (accessed_at)')
+
+    def lookup(self, article_id: str):
+        """
+        Look up an entry regardless of freshness.
+
+        Returns:
+            dict or None: payload, etag, last_modified, fetched_at and a 'fresh' flag
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT payload, etag, last_modified, fetched_at FROM articles WHERE article_id = ?',
+                (article_id,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                incr('cache_misses')
+                return None
+
+            now = time.time()
+            self._conn.execute('UPDATE articles SET accessed_at = ? WHERE article_id = ?', (now, article_id))
+            fresh = now - row[3] < self.ttl
+            if fresh:
+                self.hits += 1
+                incr('cache_hits')
+            else:
+                self.misses += 1
+                incr('cache_stale')
+            return {
+                "payload": row[0],
+                "etag": row[1],
+                "last_modified": row[2],
+                "fetched_at": row[3],
+                "fresh": fresh,
+            }
+
+    def get(self, article_id: str):
+        """Return the cached payload if it is still within the TTL, else None"""
+        entry = self.lookup(article_id)
+        return entry["payload"] if entry and entry["fresh"] else None
+
+    def missing(self, article_ids: list) -> list:
+        """Return the IDs without a fresh entry, in input order, without touching hit/miss stats"""
+        fresh_since = time.time() - self.ttl
+        with self._lock:
+            fresh = set()
+            for start in range(0, len(article_ids), 500):
+                chunk = article_ids[start:start + 500]
+                fresh.update(row[0] for row in self._conn.execute(
+                    f'SELECT article_id FROM articles WHERE fetched_at > ? AND article_id IN ({",".join("?" * len(chunk))})',
+                    (fresh_since, *chunk)
+                ))
+        return [article_id for article_id in article_ids if article_id not in fresh]
+
+    def put(self, article_id: str, url: str, payload: str, etag: str = None, last_modified: str = None):
+        """Store a payload and evict least recently used entries beyond max_entries"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (article_id, url, payload, etag, last_modified, now, now)
+            )
+            self._evict()
+
+    def touch(self, article_id: str):
+        """Mark an entry as revalidated (e.g. after a 304 Not Modified)"""
+        now = time.time()
+        with self._lock:
+            self.revalidations += 1
+            incr('cache_revalidations')
+            self._conn.execute(
+                'UPDATE articles SET fetched_at = ?, accessed_at = ? WHERE article_id = ?',
+                (now, now, article_id)
+            )
+
+    def _evict(self):
+        count = self._conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                'DELETE FROM articles WHERE article_id IN '
+                '(SELECT article_id FROM articles ORDER BY accessed_at LIMIT ?)',
+                (excess,)
+            )
+            self.evictions += excess
+            incr('cache_evictions', excess)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current number of entries"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+            "entries": len(self),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM articles')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Process-wide default cache, created on first use
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_article_cache() -> ArticleCache:
+    """Get or create the process-wide article cache"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ArticleCache()
+    return _default_cache
@@ -0,0 +1,283 @@
+import asyncio
+import copy
+import httpx
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Tuple
+
+from src.article_cache import ArticleCache, article_id_from_url, canonical_article_url
+from src.dedup import dedup_entries
+from src.fetch_backend import FETCH_BACKENDS, get_async_http_client
+from src.fetch_scheduler import Deadline, DeadlineExceeded, HostRateLimiter, get_fetch_scheduler
+from src.article import Article
+from src.get_news_content import (
+    _scrape_single_url, article_from_cache_entry, fan_out, in_flight_scrapes, parse_article_html, unique_articles
+)
+from src.get_news_list import (
+    FEED_API_URL, LISTING_ENGINES, NEWS_BASE_URL, NEWS_CHANNELS, channel_url, collect_feed_items, feed_params,
+    get_news_entries, merge_channel_entries, wrap_in_braces
+)
+from src.listing_index import get_listing_index
+from src.search_index import SearchIndex
+from src.metrics import collect_timings, incr, span
+
+
+async def afetch_html_conditional(url: str, etag: str = None, last_modified: str = None, deadline: Deadline = None, limiter: HostRateLimiter = None):
+    """Async counterpart of fetch_backend.fetch_html_conditional"""
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    with span('http_fetch'):
+        response = await get_fetch_scheduler().arequest(
+            get_async_http_client(), url, deadline, limiter, headers=headers
+        )
+    incr('fetch_bytes', len(response.content))
+    if response.status_code == 304:
+        incr('not_modified')
+        return None, etag, last_modified
+    response.raise_for_status()
+    return response.text, response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+
+async def ascrape_single_url(url: str, backend: str = 'http', cache: ArticleCache = None, limiter: HostRateLimiter = None, deadline: Deadline = None) -> Article:
+    """
+    Async counterpart of scrape_single_url
+
+    Fetching happens on the event loop and parsing in a worker thread; the
+    Selenium backend and fallback run the synchronous scraper in a thread.
+    Concurrent scrapes of the same article, sync or async, share one fetch.
+    """
+    url = canonical_article_url(url)
+    article_id = article_id_from_url(url)
+
+    async def scrape():
+        with collect_timings() as timings:
+            article = await _ascrape_single_url(url, backend, cache, limiter, deadline)
+        if article.timings is None:
+            article.timings = timings
+        return article
+
+    try:
+        article = await in_flight_scrapes.ado((article_id, backend), scrape, deadline.remaining() if deadline is not None else None)
+    except TimeoutError:
+        return Article.failed(article_id, url, DeadlineExceeded("batch deadline exceeded"))
+    return copy.copy(article)
+
+
+async def _ascrape_single_url(url: str, backend: str, cache: ArticleCache, limiter: HostRateLimiter, deadline: Deadline) -> Article:
+    article_id = article_id_from_url(url)
+    if backend not in FETCH_BACKENDS:
+        return Article.failed(article_id, url, f"unknown fetch backend '{backend}'")
+    if backend == 'selenium':
+        # Already coalesced under this article's key, so the uncoalesced scraper is called
+        return await asyncio.to_thread(_scrape_single_url, url, backend, cache, deadline)
+
+    try:
+        entry = cache.lookup(article_id) if cache is not None else None
+        cached = article_from_cache_entry(entry) if entry else None
+        if cached is not None and entry["fresh"]:
+            return cached
+
+        started = time.perf_counter()
+        if cached is not None:
+            html, etag, last_modified = await afetch_html_conditional(url, entry["etag"], entry["last_modified"], deadline, limiter)
+            if html is None:
+                # 304 Not Modified, the cached copy is still current
+                cache.touch(article_id)
+                return cached
+        else:
+            html, etag, last_modified = await afetch_html_conditional(url, deadline=deadline, limiter=limiter)
+
+        parsing = time.perf_counter()
+        article = await asyncio.to_thread(parse_article_html, html, url)
+
+        # Browser fallback when the static HTML lacks an <article>
+        if article is None:
+            if deadline is not None:
+                deadline.check()
+            return await asyncio.to_thread(_scrape_single_url, url, 'selenium', cache, deadline)
+
+        article.fetch_ms = (parsing - started) * 1000
+        article.parse_ms = (time.perf_counter() - parsing) * 1000
+        if cache is not None:
+            cache.put(article_id, url, article.to_json(), etag, last_modified)
+        return article
+
+    except Exception as e:
+        incr('errors')
+        if isinstance(e, (httpx.TimeoutException, TimeoutError)):
+            incr('timeouts')
+        return Article.failed(article_id, url, e)
+
+
+async def aiter_news_data(urls: List[str], max_concurrency: int = 10, backend: str = 'http', cache: ArticleCache = None, rate: float = None, search_index: SearchIndex = None, timeout: float = None) -> AsyncIterator[Tuple[int, Article]]:
+    """
+    Scrape a list of URLs concurrently, yielding each result as soon as it is parsed
+
+    URLs naming the same article are scraped once and the result is yielded
+    for every index it was requested at.
+
+    Args:
+        urls (List[str]): List of URLs to scrape
+        max_concurrency (int): Maximum number of requests in flight (default: 10)
+        backend (str): Fetch backend, 'http' (default) or 'selenium'
+        cache (ArticleCache): Optional article cache consulted before fetching
+        rate (float): Optional requests/s per host for this batch; it can only tighten the shared WSCN_RATE_LIMIT
+        search_index (SearchIndex): Optional full-text index that freshly fetched articles are added to
+        timeout (float): Optional deadline in seconds for the whole batch; articles not fetched by then fail
+
+    Yields:
+        Tuple[int, Article]: Index of the URL in the input list and its scraped article
+    """
+    if not urls:
+        return
+
+    # Each article is scraped once, however many times (and in whichever URL form) it is requested
+    unique_urls, positions = unique_articles(urls)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    limiter = get_fetch_scheduler().batch_limiter(rate)
+    deadline = Deadline.after(timeout)
+
+    async def bounded(index, url):
+        async with semaphore:
+            article = await ascrape_single_url(url, backend, cache, limiter, deadline)
+        # Cache hits were indexed when they were first fetched
+        if search_index is not None and article.ok and not article.from_cache:
+            await asyncio.to_thread(search_index.add, article)
+        return index, article
+
+    pending = {asyncio.create_task(bounded(i, url)) for i, url in enumerate(unique_urls)}
+    try:
+        while pending:
+            # Finished tasks are dropped so yielded articles are not kept alive by this batch
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, article = task.result()
+                for position in fan_out(article, positions[index]):
+                    yield position
+    finally:
+        # Drop pending work if the consumer stops early
+        for task in pending:
+            task.cancel()
+
+
+async def aget_news_data(urls: List[str], max_concurrency: int = 10, backend: str = 'http', cache: ArticleCache = None, rate: float = None, search_index: SearchIndex = None, timeout: float = None) -> List[Article]:
+    """
+    Scrape a list of URLs concurrently on the running event loop
+
+    Args:
+        urls (List[str]): List of URLs to scrape
+        max_concurrency (int): Maximum number of requests in flight (default: 10)
+        backend (str): Fetch backend, 'http' (default) or 'selenium'
+        cache (ArticleCache): Optional article cache consulted before fetching
+        rate (float): Optional requests/s per host for this batch; it can only tighten the shared WSCN_RATE_LIMIT
+        search_index (SearchIndex): Optional full-text index that freshly fetched articles are added to
+        timeout (float): Optional deadline in seconds for the whole batch; articles not fetched by then fail
+
+    Returns:
+        List[Article]: Scraped articles, in input order
+    """
+    results = [None] * len(urls)
+    async for index, result in aiter_news_data(urls, max_concurrency, backend, cache, rate, search_index, timeout):
+        results[index] = result
+    return results
+
+
+async def aget_news_entries(url='https://wallstreetcn.com/news/global', time_filter=24, engine='browser', incremental=False, limit=20, api_url=FEED_API_URL, max_pages=100):
+    """
+    get_news_entries 的异步版本。'feed' 引擎在事件循环上直接分页请求 JSON 接口，'browser' 引擎在工作线程中运行。
+
+    Args:
+        url (str, 可选)：要爬取的页面 URL。默认值为 'https://wallstreetcn.com/news/global'。
+        time_filter (int, 可选)：如果提供，则仅返回在过去 'time_filter' 小时内发布的新闻条目。默认值为 24 小时。
+        engine (str, 可选)：列表引擎，'browser' 或 'feed'。默认值为 'browser'。
+        incremental (bool, 可选)：如果为 True，仅抓取上次之后的新条目并与持久化的时间窗口合并。默认值为 False。
+    Returns:
+        list：包含编号，标题，URL的新闻条目列表。
+    """
+    if engine not in LISTING_ENGINES:
+        raise ValueError(f"Unknown listing engine '{engine}', expected one of {LISTING_ENGINES}")
+    if engine == 'browser':
+        return await asyncio.to_thread(get_news_entries, url, time_filter, incremental)
+
+    index = get_listing_index() if incremental else None
+    high_water_id = index.high_water_mark(url, time_filter) if index else None
+
+    cutoff_time = None
+    if time_filter is not None:
+        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=time_filter)
+
+    params = feed_params(url, limit)
+    news_entries = []
+    seen_ids = set()
+    client = get_async_http_client()
+    scheduler = get_fetch_scheduler()
+
+    try:
+        for _ in range(max_pages):
+            with span('feed_fetch'):
+                response = await scheduler.arequest(client, api_url, params=params, headers={'Accept': 'application/json'})
+            incr('fetch_bytes', len(response.content))
+            response.raise_for_status()
+            data = response.json().get('data') or {}
+
+            reached_cutoff = collect_feed_items(data, news_entries, seen_ids, cutoff_time, high_water_id)
+
+            next_cursor = data.get('next_cursor')
+            if reached_cutoff or not next_cursor or next_cursor == params['cursor']:
+                break
+            params['cursor'] = next_cursor
+
+    except Exception as e:
+        print(f"Error fetching the news feed: {e}", file=sys.stderr)
+        # A partial crawl must not advance the high-water mark past missing items
+        return news_entries
+
+    if index is not None:
+        index.merge(url, news_entries, covered_hours=None if high_water_id is not None else time_filter)
+        return index.window(url, time_filter)
+    return news_entries
+
+
+async def aget_multi_channel_news_entries(channels=NEWS_CHANNELS, time_filter=24, engine='browser', incremental=False, base_url=NEWS_BASE_URL, api_url=FEED_API_URL):
+    """
+    get_multi_channel_news_entries 的异步版本，各频道在同一事件循环上并发爬取，共享异步连接池与列表浏览器池。
+
+    Returns:
+        list：按文章编号去重、按发布时间排序并带 'Channels' 频道标注的新闻条目列表。
+    """
+    if engine not in LISTING_ENGINES:
+        raise ValueError(f"Unknown listing engine '{engine}', expected one of {LISTING_ENGINES}")
+    channels = list(dict.fromkeys(channels))
+    results = await asyncio.gather(*(
+        aget_news_entries(channel_url(channel, base_url), time_filter, engine=engine, incremental=incremental, api_url=api_url)
+        for channel in channels
+    ), return_exceptions=True)
+    # One failing channel must not discard the others' entries
+    for channel, result in zip(channels, results):
+        if isinstance(result, BaseException):
+            print(f"Error crawling channel '{channel}': {result!r}", file=sys.stderr)
+    return merge_channel_entries({
+        channel: [] if isinstance(result, BaseException) else result
+        for channel, result in zip(channels, results)
+    })
+
+
+async def aget_news_entries_as_json(url='https://wallstreetcn.com/news/global', time_filter=24, indent=0, engine='browser', incremental=False, channels=None, dedup=False, archive_writer=None):
+    """get_news_entries_as_json 的异步版本。"""
+    if channels:
+        print(f"Crawling news entries from channels {', '.join(channels)} ({engine})", file=sys.stderr)
+        news_entries = await aget_multi_channel_news_entries(channels, time_filter, engine=engine, incremental=incremental)
+    else:
+        print(f"Crawling news entries from {url} ({engine})", file=sys.stderr)
+        news_entries = await aget_news_entries(url, time_filter, engine=engine, incremental=incremental)
+    if dedup:
+        news_entries, _ = dedup_entries(news_entries)
+    if archive_writer is not None:
+        await asyncio.to_thread(archive_writer.write_new_entries, news_entries)
+    return wrap_in_braces(json.dumps(news_entries, indent=indent, ensure_ascii=False))
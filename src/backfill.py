@@ -0,0 +1,245 @@
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+from multiprocessing.util import Finalize
+from typing import Iterable, Iterator, List
+
+from src.archive import ARCHIVE_FORMATS, ArchiveWriter
+from src.article import Article
+from src.article_cache import DEFAULT_CACHE_PATH, article_id_from_url
+from src.fetch_scheduler import DEFAULT_RATE
+from src.get_news_list import NEWS_BASE_URL
+from src.metrics import incr
+from src.search_index import SearchIndex, get_search_index
+
+
+DEFAULT_CHECKPOINT_PATH = os.environ.get(
+    'WSCN_BACKFILL_CHECKPOINT',
+    os.path.join(os.path.dirname(DEFAULT_CACHE_PATH), 'backfill.sqlite3')
+)
+
+# URLs handed to a worker at a time; also the granularity of checkpoints
+DEFAULT_SHARD_SIZE = 50
+# Fetch threads per worker process, overlapping network waits with parsing
+DEFAULT_THREADS = 3
+
+
+def article_url(article_id, base_url: str = NEWS_BASE_URL) -> str:
+    return f"{base_url}/articles/{article_id}"
+
+
+def parse_id_range(spec: str) -> range:
+    """'3700000-3727050' (inclusive, either order) as a range of article IDs, newest first"""
+    first, _, last = spec.partition('-')
+    first, last = int(first), int(last or first)
+    return range(max(first, last), min(first, last) - 1, -1)
+
+
+class BackfillCheckpoint:
+    """
+    Record of the articles a back-fill has already scraped, so an interrupted
+    run resumes where it left off. Written by the coordinating process only.
+    """
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS backfill ('
+            ' article_id TEXT PRIMARY KEY,'
+            ' url TEXT NOT NULL,'
+            ' status TEXT NOT NULL,'
+            ' error TEXT,'
+            ' finished_at REAL NOT NULL)'
+        )
+
+    def pending(self, urls: List[str], retry_errors: bool = False) -> List[str]:
+        """Return the URLs not scraped yet (or that failed, with retry_errors), in input order"""
+        ids = [article_id_from_url(url) for url in urls]
+        done = set()
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                done.update(row[0] for row in self._conn.execute(
+                    f'SELECT article_id FROM backfill WHERE article_id IN ({",".join("?" * len(chunk))})'
+                    + (" AND status = 'ok'" if retry_errors else ''),
+                    chunk
+                ))
+        return [url for url, article_id in zip(urls, ids) if article_id not in done]
+
+    def record_many(self, articles: Iterable[Article]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO backfill VALUES (?, ?, ?, ?, ?)',
+                    ((article.id, article.url, article.status, article.error, now) for article in articles)
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM backfill GROUP BY status').fetchall()
+        return dict(rows)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM backfill')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Per-process state of a pool worker, set up by _init_worker
+_worker = {}
+
+
+def _init_worker(rate: float, threads: int, backend: str):
+    """Give each worker process its own fetch scheduler, HTTP session and driver pool"""
+    from src.driver_pool import shutdown_driver_pools
+    from src.fetch_backend import close_http_client
+    from src.fetch_scheduler import FetchScheduler, set_fetch_scheduler
+
+    # The rate budget is shared by the whole pool
+    set_fetch_scheduler(FetchScheduler(rate=rate, burst=max(1, int(rate))))
+    _worker.update(threads=threads, backend=backend)
+    Finalize(None, close_http_client, exitpriority=10)
+    Finalize(None, shutdown_driver_pools, exitpriority=10)
+
+
+def _scrape_shard(urls: List[str]) -> List[Article]:
+    from src.get_news_content import get_news_data
+
+    return get_news_data(urls, max_workers=_worker["threads"], backend=_worker["backend"])
+
+
+def _shards(urls: List[str], shard_size: int) -> Iterator[List[str]]:
+    for start in range(0, len(urls), shard_size):
+        yield urls[start:start + shard_size]
+
+
+def backfill(urls: List[str], archive_writer: ArchiveWriter = None, search_index: SearchIndex = None,
+             checkpoint: BackfillCheckpoint = None, processes: int = None, threads: int = DEFAULT_THREADS,
+             shard_size: int = DEFAULT_SHARD_SIZE, rate: float = DEFAULT_RATE, backend: str = 'http',
+             retry_errors: bool = False, progress=None) -> dict:
+    """
+    Scrape a large list of article URLs across a pool of worker processes.
+
+    Parsing holds the GIL, so one process tops out at one core; here each
+    worker process fetches and parses its shards with its own HTTP session,
+    and the coordinating process writes every finished shard to the archive
+    and search index and then checkpoints it. Re-running with the same
+    checkpoint skips the URLs already done.
+
+    Args:
+        urls (List[str]): Article URLs to scrape
+        archive_writer (ArchiveWriter): Store that successfully scraped articles are archived to
+        search_index (SearchIndex): Optional full-text index that successful articles are added to
+        checkpoint (BackfillCheckpoint): Progress record, default the one at WSCN_BACKFILL_CHECKPOINT
+        processes (int): Worker processes, default one per CPU
+        threads (int): Fetch threads per worker process
+        shard_size (int): URLs per shard
+        rate (float): Requests per second to the site across all workers (0 disables limiting)
+        backend (str): Fetch backend, 'http' (default) or 'selenium'
+        retry_errors (bool): Also re-scrape URLs that failed in an earlier run
+        progress (callable): Called with the stats dict after each shard
+
+    Returns:
+        dict: total, skipped, scraped, ok, failed and elapsed_s
+    """
+    checkpoint = checkpoint if checkpoint is not None else BackfillCheckpoint()
+    urls = list(dict.fromkeys(urls))
+    pending = checkpoint.pending(urls, retry_errors)
+    stats = {"total": len(urls), "skipped": len(urls) - len(pending), "scraped": 0, "ok": 0, "failed": 0, "elapsed_s": 0.0}
+    if not pending:
+        return stats
+
+    processes = max(1, min(processes or os.cpu_count() or 1, -(-len(pending) // shard_size)))
+    started = time.perf_counter()
+    # Spawned workers start clean instead of inheriting the parent's threads and connections
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes, _init_worker, (rate / processes, threads, backend)) as pool:
+        for articles in pool.imap_unordered(_scrape_shard, _shards(pending, shard_size)):
+            # Results are stored before they are checkpointed, so a crash in between only repeats work
+            # Failures are kept in the checkpoint only; on an ID walk most of them are not articles at all
+            if archive_writer is not None:
+                archive_writer.write_many([article for article in articles if article.ok])
+                archive_writer.flush()
+            if search_index is not None:
+                search_index.add_many(articles)
+            checkpoint.record_many(articles)
+
+            ok = sum(1 for article in articles if article.ok)
+            stats["scraped"] += len(articles)
+            stats["ok"] += ok
+            stats["failed"] += len(articles) - ok
+            stats["elapsed_s"] = round(time.perf_counter() - started, 2)
+            incr('backfilled_articles', ok)
+            if progress is not None:
+                progress(dict(stats))
+    return stats
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description='Back-fill wallstreetcn articles into the archive with a pool of worker processes.'
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--ids', action='append', help="inclusive article ID range such as 3700000-3727050 (repeatable)")
+    source.add_argument('--urls-file', help="file with one article URL or ID per line ('-' for stdin)")
+    parser.add_argument('--archive-dir', default=os.environ.get('WSCN_ARCHIVE_DIR'), help='archive root (default WSCN_ARCHIVE_DIR)')
+    parser.add_argument('--format', default=os.environ.get('WSCN_ARCHIVE_FORMAT', 'jsonl'), choices=ARCHIVE_FORMATS)
+    parser.add_argument('--index', action='store_true', help='also add articles to the local search index')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT_PATH, help='checkpoint database for resuming')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS, help='fetch threads per worker')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help='requests/s to the site across all workers (0 disables limiting)')
+    parser.add_argument('--backend', default='http', choices=('http', 'selenium'))
+    parser.add_argument('--base-url', default=NEWS_BASE_URL)
+    parser.add_argument('--retry-errors', action='store_true', help='re-scrape URLs that failed in an earlier run')
+    args = parser.parse_args(argv)
+
+    if not args.archive_dir:
+        parser.error('--archive-dir (or WSCN_ARCHIVE_DIR) is required')
+
+    if args.ids:
+        urls = [article_url(article_id, args.base_url) for spec in args.ids for article_id in parse_id_range(spec)]
+    else:
+        with (sys.stdin if args.urls_file == '-' else open(args.urls_file, encoding='utf-8')) as f:
+            lines = [line.strip() for line in f if line.strip()]
+        urls = [line if '/' in line else article_url(line, args.base_url) for line in lines]
+
+    def report(stats):
+        print(f"{stats['skipped'] + stats['scraped']}/{stats['total']} done, {stats['ok']} ok, "
+              f"{stats['failed']} failed, {stats['elapsed_s']} s", file=sys.stderr)
+
+    checkpoint = BackfillCheckpoint(args.checkpoint)
+    with ArchiveWriter(args.archive_dir, 'articles', args.format) as writer:
+        stats = backfill(
+            urls, archive_writer=writer, search_index=get_search_index() if args.index else None, checkpoint=checkpoint,
+            processes=args.processes, threads=args.threads, shard_size=args.shard_size, rate=args.rate,
+            backend=args.backend, retry_errors=args.retry_errors, progress=report
+        )
+    checkpoint.close()
+    report(stats)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+import asyncio
+import difflib
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import List
+
+import httpx
+
+from src.article import Article
+from src.article_cache import DEFAULT_CACHE_PATH, ArticleCache, article_id_from_url, canonical_article_url
+from src.async_news import afetch_html_conditional
+from src.fetch_backend import aclose_async_http_client
+from src.fetch_scheduler import Deadline, get_fetch_scheduler
+from src.get_news_content import parse_article_html
+from src.metrics import incr, span
+
+
+DEFAULT_VERSIONS_PATH = os.environ.get(
+    'WSCN_VERSIONS_PATH',
+    os.path.join(os.path.dirname(DEFAULT_CACHE_PATH), 'versions.sqlite3')
+)
+
+# Breaking news settles within hours; older articles are not re-fetched
+DEFAULT_MAX_AGE_HOURS = float(os.environ.get('WSCN_REFRESH_MAX_AGE', 6))
+
+
+def version_hash(title: str, content: str) -> str:
+    return hashlib.sha1(f'{title}\n{content}'.encode('utf-8')).hexdigest()
+
+
+def paragraph_diff(old: str, new: str) -> List[dict]:
+    """
+    Paragraph-level diff of two article bodies, without the unchanged paragraphs
+
+    Returns:
+        List[dict]: one {"at", "removed", "added"} hunk per change, where 'at'
+        is the index of the first affected paragraph in the old version
+    """
+    old_paragraphs, new_paragraphs = old.split('\n'), new.split('\n')
+    matcher = difflib.SequenceMatcher(None, old_paragraphs, new_paragraphs, autojunk=False)
+    return [
+        {"at": i1, "removed": old_paragraphs[i1:i2], "added": new_paragraphs[j1:j2]}
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != 'equal'
+    ]
+
+
+def _timestamp(published_at: str):
+    try:
+        return datetime.fromisoformat(published_at).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class VersionStore:
+    """
+    Last seen version of each tracked article: its content, content hash,
+    version number and HTTP validators, so a refresh can send conditional
+    requests and diff whatever changed.
+    """
+
+    def __init__(self, path: str = DEFAULT_VERSIONS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS versions ('
+            ' article_id TEXT PRIMARY KEY,'
+            ' url TEXT NOT NULL,'
+            ' title TEXT NOT NULL,'
+            ' published_at TEXT,'
+            ' content TEXT NOT NULL,'
+            ' content_hash TEXT NOT NULL,'
+            ' version INTEGER NOT NULL,'
+            ' etag TEXT,'
+            ' last_modified TEXT,'
+            ' first_seen REAL NOT NULL,'
+            ' checked_at REAL NOT NULL,'
+            ' changed_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS versions_first_seen ON versions (first_seen)')
+
+    def get(self, article_id: str):
+        """Return the last seen version as a dict, or None if the article is not tracked"""
+        with self._lock:
+            return self._get(article_id)
+
+    def _get(self, article_id):
+        self._conn.row_factory = sqlite3.Row
+        try:
+            row = self._conn.execute('SELECT * FROM versions WHERE article_id = ?', (article_id,)).fetchone()
+        finally:
+            self._conn.row_factory = None
+        return dict(row) if row is not None else None
+
+    def tracked(self, max_age_hours: float = DEFAULT_MAX_AGE_HOURS) -> List[str]:
+        """URLs of tracked articles published (or first seen) within the past 'max_age_hours' hours"""
+        since = time.time() - max_age_hours * 3600
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT url, published_at, first_seen FROM versions ORDER BY first_seen DESC'
+            ).fetchall()
+        return [url for url, published_at, first_seen in rows if (_timestamp(published_at) or first_seen) >= since]
+
+    def record(self, article: Article, etag: str = None, last_modified: str = None) -> dict:
+        """
+        Store a freshly fetched version of an article
+
+        Returns:
+            dict: the previous version (None if the article is new) and the new
+            version number, which is unchanged when the content hash matches
+        """
+        content_hash = version_hash(article.title, article.content)
+        now = time.time()
+        # Read and write in one transaction, so overlapping refreshes cannot both bump the same version
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                version, previous = self._record(article, content_hash, etag, last_modified, now)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return {"previous": previous, "version": version}
+
+    def _record(self, article, content_hash, etag, last_modified, now):
+        previous = self._get(article.id)
+        if previous is None:
+            version = 1
+            self._conn.execute(
+                'INSERT OR REPLACE INTO versions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (article.id, article.url, article.title, article.published_at, article.content, content_hash,
+                 version, etag, last_modified, now, now, now)
+            )
+        elif previous["content_hash"] == content_hash:
+            version = previous["version"]
+            self._conn.execute(
+                'UPDATE versions SET etag = ?, last_modified = ?, checked_at = ? WHERE article_id = ?',
+                (etag, last_modified, now, article.id)
+            )
+        else:
+            version = previous["version"] + 1
+            self._conn.execute(
+                'UPDATE versions SET url = ?, title = ?, published_at = ?, content = ?, content_hash = ?,'
+                ' version = ?, etag = ?, last_modified = ?, checked_at = ?, changed_at = ? WHERE article_id = ?',
+                (article.url, article.title, article.published_at, article.content, content_hash,
+                 version, etag, last_modified, now, now, article.id)
+            )
+        return version, previous
+
+    def touch(self, article_id: str):
+        """Mark a tracked article as checked (e.g. after a 304 Not Modified)"""
+        with self._lock:
+            self._conn.execute('UPDATE versions SET checked_at = ? WHERE article_id = ?', (time.time(), article_id))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM versions').fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM versions')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _is_stale(previous: dict, since: float) -> bool:
+    """Whether a tracked article is too old to be re-fetched"""
+    return (_timestamp(previous["published_at"]) or previous["first_seen"]) < since
+
+
+async def _arefresh_one(url, store, cache, limiter, deadline):
+    article_id = article_id_from_url(url)
+    previous = store.get(article_id)
+    try:
+        with span('refresh'):
+            if previous is not None:
+                html, etag, last_modified = await afetch_html_conditional(
+                    url, previous["etag"], previous["last_modified"], deadline, limiter
+                )
+                if html is None:
+                    store.touch(article_id)
+                    return {"change": "unchanged"}
+            else:
+                html, etag, last_modified = await afetch_html_conditional(url, deadline=deadline, limiter=limiter)
+            article = await asyncio.to_thread(parse_article_html, html, url)
+            if article is None:
+                raise ValueError("no <article> element found")
+    except Exception as e:
+        incr('errors')
+        if isinstance(e, (httpx.TimeoutException, TimeoutError)):
+            incr('timeouts')
+        return {"change": "error", "id": article_id, "url": url, "error": str(e)}
+
+    if cache is not None:
+        cache.put(article_id, url, article.to_json(), etag, last_modified)
+    recorded = await asyncio.to_thread(store.record, article, etag, last_modified)
+    result = {"id": article_id, "url": url, "title": article.title, "published_at": article.published_at, "version": recorded["version"]}
+    previous = recorded["previous"]
+    if previous is None:
+        return {**result, "change": "new", "content": article.content}
+    if previous["version"] == recorded["version"]:
+        return {"change": "unchanged"}
+    result["change"] = "updated"
+    if previous["title"] != article.title:
+        result["previous_title"] = previous["title"]
+    result["diff"] = paragraph_diff(previous["content"], article.content)
+    return result
+
+
+async def arefresh_articles(urls: List[str] = None, store: VersionStore = None, cache: ArticleCache = None,
+                            max_age_hours: float = DEFAULT_MAX_AGE_HOURS, max_concurrency: int = 10,
+                            rate: float = None, timeout: float = None) -> dict:
+    """
+    Re-check articles for updates and return only what changed.
+
+    Tracked articles are re-fetched with conditional requests (304 responses
+    cost no body), and a new version is recorded only when the content hash
+    changes; updated articles come back as a paragraph-level diff against the
+    last version seen, articles seen for the first time in full. Tracked
+    articles older than 'max_age_hours' are skipped without a request.
+
+    Args:
+        urls (List[str]): Article URLs to check, default every tracked article within 'max_age_hours'
+        store (VersionStore): Version store, default the one at WSCN_VERSIONS_PATH
+        cache (ArticleCache): Optional article cache that fetched versions are written to
+        max_age_hours (float): Age in hours beyond which tracked articles are no longer re-fetched
+        max_concurrency (int): Maximum number of requests in flight
+        rate (float): Optional requests/s per host for this refresh; it can only tighten the shared WSCN_RATE_LIMIT
+        timeout (float): Optional deadline in seconds for the whole refresh
+
+    Returns:
+        dict: 'changed' (new and updated articles), 'failed', and the 'unchanged' and 'skipped' counts
+    """
+    store = store if store is not None else get_version_store()
+    since = time.time() - max_age_hours * 3600
+    if urls is None:
+        urls = store.tracked(max_age_hours)
+    urls = list(dict.fromkeys(canonical_article_url(url) for url in urls))
+
+    due = []
+    for url in urls:
+        previous = store.get(article_id_from_url(url))
+        if previous is None or not _is_stale(previous, since):
+            due.append(url)
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    limiter = get_fetch_scheduler().batch_limiter(rate)
+    deadline = Deadline.after(timeout)
+
+    async def bounded(url):
+        async with semaphore:
+            return await _arefresh_one(url, store, cache, limiter, deadline)
+
+    results = await asyncio.gather(*(bounded(url) for url in due))
+    changed = [result for result in results if result["change"] in ('new', 'updated')]
+    failed = [{key: result[key] for key in ('id', 'url', 'error')} for result in results if result["change"] == 'error']
+    incr('refresh_changed', len(changed))
+    return {
+        "changed": changed,
+        "failed": failed,
+        "unchanged": len(results) - len(changed) - len(failed),
+        "skipped": len(urls) - len(due),
+    }
+
+
+def refresh_articles(urls: List[str] = None, store: VersionStore = None, cache: ArticleCache = None,
+                     max_age_hours: float = DEFAULT_MAX_AGE_HOURS, max_concurrency: int = 10,
+                     rate: float = None, timeout: float = None) -> dict:
+    """Synchronous arefresh_articles, run on a private event loop"""
+    async def run():
+        try:
+            return await arefresh_articles(urls, store, cache, max_age_hours, max_concurrency, rate, timeout)
+        finally:
+            await aclose_async_http_client()
+    return asyncio.run(run())
+
+
+# Process-wide default store, created on first use
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_version_store() -> VersionStore:
+    """Get or create the process-wide version store"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = VersionStore()
+    return _default_store
@@ -0,0 +1,166 @@
+import math
+import re
+from collections import Counter
+from typing import Callable, List
+
+from src.article import Article
+from src.metrics import span
+from src.search_index import tokenize
+
+
+# Output modes for article content under a budget
+OUTPUT_MODES = ('full', 'lead', 'key_sentences', 'truncate')
+BUDGET_UNITS = ('tokens', 'chars')
+
+ELLIPSIS = '…'
+
+# Per-article budget used when a condensed mode is requested without a total budget
+DEFAULT_ARTICLE_BUDGET = 300
+
+_CJK = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3000-\u303f\uff00-\uffef]')
+# Sentence ends, keeping the terminator with its sentence
+_SENTENCE_END = re.compile(r'(?<=[。！？；!?;])|(?<=\.)\s+')
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: one per CJK character or full-width punctuation, one per four other characters"""
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def _cost_function(unit: str) -> Callable[[str], int]:
+    if unit not in BUDGET_UNITS:
+        raise ValueError(f"Unknown budget unit '{unit}', expected one of {BUDGET_UNITS}")
+    return estimate_tokens if unit == 'tokens' else len
+
+
+def allocate_budget(needs: List[int], budget: int) -> List[int]:
+    """
+    Split a budget across items by max-min fairness: items needing less than an
+    equal share get all they need, and what they leave is shared among the rest.
+    """
+    allowances = [0] * len(needs)
+    pending = sorted(range(len(needs)), key=lambda i: needs[i])
+    remaining = budget
+    while pending:
+        share = remaining // len(pending)
+        i = pending[0]
+        if needs[i] <= share:
+            allowances[i] = needs[i]
+            remaining -= needs[i]
+            pending.pop(0)
+        else:
+            for i in pending:
+                allowances[i] = share
+            break
+    return allowances
+
+
+def _truncate(text: str, allowance: int, cost) -> str:
+    """Longest prefix of text (plus an ellipsis) within the allowance"""
+    if cost(text) <= allowance:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if cost(text[:middle] + ELLIPSIS) <= allowance:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low].rstrip() + ELLIPSIS if low else ''
+
+
+def lead(content: str, allowance: int, cost) -> str:
+    """Leading paragraphs that fit the allowance, truncating the first one if needed"""
+    kept = []
+    used = 0
+    for paragraph in content.split('\n'):
+        paragraph_cost = cost(paragraph) + (1 if kept else 0)
+        if used + paragraph_cost > allowance:
+            if not kept:
+                return _truncate(paragraph, allowance, cost)
+            break
+        kept.append(paragraph)
+        used += paragraph_cost
+    return '\n'.join(kept)
+
+
+def split_sentences(content: str) -> List[str]:
+    sentences = []
+    for paragraph in content.split('\n'):
+        sentences.extend(sentence.strip() for sentence in _SENTENCE_END.split(paragraph) if sentence.strip())
+    return sentences
+
+
+def key_sentences(content: str, allowance: int, cost, title: str = '') -> str:
+    """
+    Highest-scoring sentences that fit the allowance, in their original order.
+
+    Sentences score by how frequent their terms are across the article, with a
+    boost for terms in the title and for the opening sentences.
+    """
+    # Repeated sentences (pull quotes, captions) are only worth their first occurrence
+    sentences = list(dict.fromkeys(split_sentences(content)))
+    if not sentences:
+        return ''
+    frequencies = Counter(tokenize(content))
+    title_terms = set(tokenize(title))
+
+    def score(index, sentence):
+        terms = tokenize(sentence)
+        if not terms:
+            return 0.0
+        weight = sum(frequencies[term] * (2 if term in title_terms else 1) for term in terms)
+        return weight / math.sqrt(len(terms)) * (1.5 if index < 2 else 1.0)
+
+    ranked = sorted(range(len(sentences)), key=lambda i: -score(i, sentences[i]))
+    chosen = []
+    used = 0
+    for i in ranked:
+        sentence_cost = cost(sentences[i])
+        if used + sentence_cost <= allowance:
+            chosen.append(i)
+            used += sentence_cost
+    if not chosen:
+        return _truncate(sentences[ranked[0]], allowance, cost)
+    text = ''
+    for i in sorted(chosen):
+        # Chinese sentences run on directly, others are separated by a space
+        text += (' ' if text and text[-1].isascii() else '') + sentences[i]
+    return text
+
+
+def condense_articles(articles: List[Article], budget: int, mode: str = 'lead', unit: str = 'tokens') -> List[Article]:
+    """
+    Fit the content of a batch of articles into a total budget, in place.
+
+    The budget is shared fairly across the successful articles, so short
+    articles stay whole and long ones are condensed with 'mode':
+    'lead' keeps the opening paragraphs, 'key_sentences' the highest-scoring
+    sentences and 'truncate' a prefix of the body. 'full' leaves content as is.
+
+    Args:
+        articles (List[Article]): Scraped articles
+        budget (int): Total content budget for the batch
+        mode (str): 'full', 'lead', 'key_sentences' or 'truncate'
+        unit (str): 'tokens' (estimated) or 'chars'
+    """
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output mode '{mode}', expected one of {OUTPUT_MODES}")
+    cost = _cost_function(unit)
+    if mode == 'full':
+        return articles
+
+    with span('condense'):
+        candidates = [article for article in articles if article.ok and article.content]
+        needs = [cost(article.content) for article in candidates]
+        for article, need, allowance in zip(candidates, needs, allocate_budget(needs, max(0, budget))):
+            if need <= allowance:
+                continue
+            if mode == 'lead':
+                article.content = lead(article.content, allowance, cost)
+            elif mode == 'key_sentences':
+                article.content = key_sentences(article.content, allowance, cost, article.title)
+            else:
+                article.content = _truncate(article.content, allowance, cost)
+    return articles
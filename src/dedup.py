@@ -0,0 +1,215 @@
+import hashlib
+import re
+import zlib
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.article import Article
+from src.metrics import incr
+
+
+# Jaccard similarity above which two texts count as the same story
+TITLE_THRESHOLD = 0.6
+CONTENT_THRESHOLD = 0.7
+
+# Shingle sizes in characters: headlines are short, bodies long enough for 5-grams
+TITLE_SHINGLE = 2
+CONTENT_SHINGLE = 5
+
+NUM_PERM = 64
+# 21 bands of 3 rows put the LSH candidate threshold around Jaccard 0.36,
+# well below the thresholds above, so true near-duplicates are rarely missed
+LSH_BANDS = 21
+
+_MAX_HASH = (1 << 32) - 1
+# Fixed permutation coefficients so signatures are comparable across runs. Each
+# permutation is a multiply-shift hash, ((a * h + b) mod 2**64) >> 32 with odd
+# 'a', which numpy evaluates for all shingles at once in wrapping uint64 arithmetic.
+_PERM_A, _PERM_B = (
+    np.array([
+        int.from_bytes(hashlib.blake2b(f'{name}{i}'.encode(), digest_size=8).digest(), 'big') | odd
+        for i in range(NUM_PERM)
+    ], dtype=np.uint64)[:, np.newaxis]
+    for name, odd in (('a', 1), ('b', 0))
+)
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize(text: str) -> str:
+    """Lowercase and drop whitespace and punctuation"""
+    return _NON_WORD.sub('', text.lower())
+
+
+def content_hash(text: str) -> str:
+    """Exact fingerprint of the normalized text"""
+    return hashlib.sha1(normalize(text).encode('utf-8')).hexdigest()
+
+
+def shingles(text: str, size: int) -> set:
+    """Character n-grams of the normalized text, which suits unsegmented Chinese"""
+    text = normalize(text)
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash(features: set) -> Tuple[int, ...]:
+    """MinHash signature of a set of shingles"""
+    if not features:
+        return (_MAX_HASH,) * NUM_PERM
+    hashes = np.fromiter(
+        (zlib.crc32(f.encode('utf-8')) for f in features),
+        dtype=np.uint64, count=len(features)
+    )
+    return tuple(((_PERM_A * hashes + _PERM_B) >> np.uint64(32)).min(axis=1).tolist())
+
+
+def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Jaccard similarity estimated from two MinHash signatures"""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+class NearDuplicateIndex:
+    """
+    Exact-hash plus MinHash/LSH index for near-duplicate lookup.
+
+    Signatures are split into bands; texts sharing any band are candidates and
+    are confirmed by their estimated Jaccard similarity, so a lookup only
+    compares against a handful of entries instead of the whole index.
+    """
+
+    def __init__(self, threshold: float = CONTENT_THRESHOLD, shingle_size: int = CONTENT_SHINGLE, bands: int = LSH_BANDS):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.rows = NUM_PERM // bands
+        self.bands = bands
+        self._exact = {}
+        self._signatures = {}
+        self._buckets = [{} for _ in range(bands)]
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows] for i in range(self.bands)]
+
+    def query(self, text: str) -> List[Tuple[str, float]]:
+        """Return (key, similarity) of indexed texts similar to 'text', most similar first"""
+        return self._query(content_hash(text), minhash(shingles(text, self.shingle_size)))
+
+    def _query(self, exact, signature):
+        if exact in self._exact:
+            return [(self._exact[exact], 1.0)]
+        candidates = set()
+        for bucket, band in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(band, ()))
+        matches = []
+        for key in candidates:
+            score = similarity(signature, self._signatures[key])
+            if score >= self.threshold:
+                matches.append((key, score))
+        return sorted(matches, key=lambda match: -match[1])
+
+    def add(self, key: str, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Index 'text' under 'key' unless it duplicates an indexed text.
+
+        Returns:
+            (key, similarity) of the best match if 'text' is a duplicate, else None
+        """
+        exact = content_hash(text)
+        signature = minhash(shingles(text, self.shingle_size))
+        matches = self._query(exact, signature)
+        if matches:
+            return matches[0]
+        self._exact[exact] = key
+        self._signatures[key] = signature
+        for bucket, band in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(band, []).append(key)
+        return None
+
+    def __len__(self):
+        return len(self._signatures)
+
+
+def _clusters(items, index, key_of, text_of):
+    """
+    Assign items to clusters led by their first (representative) item
+
+    Returns:
+        (clusters, matches): members per representative key, and per item the
+        (representative key, similarity) it duplicates or None
+    """
+    clusters = {}
+    matches = []
+    for item in items:
+        key = key_of(item)
+        # The same key twice in a batch is dropped without being reported as a member
+        match = (key, 1.0) if key in clusters else index.add(key, text_of(item))
+        matches.append(match)
+        if match is None:
+            clusters[key] = []
+        elif match[0] != key:
+            clusters[match[0]].append({"key": key, "similarity": round(match[1], 3)})
+    return clusters, matches
+
+
+def dedup_entries(entries: Iterable[dict], threshold: float = TITLE_THRESHOLD) -> Tuple[List[dict], List[dict]]:
+    """
+    Title-level dedup of listing entries, before any article is fetched.
+
+    The first entry of each cluster is kept (listings are newest first) and
+    gains a 'Duplicates' list with the URLs of the entries folded into it.
+
+    Returns:
+        (entries, clusters): the kept entries renumbered from 1, and one
+        {"representative", "members"} record per cluster with duplicates
+    """
+    entries = list(entries)
+    index = NearDuplicateIndex(threshold, TITLE_SHINGLE)
+    clusters, matches = _clusters(entries, index, lambda entry: entry["URL"], lambda entry: entry["Title"])
+
+    kept = []
+    for entry, match in zip(entries, matches):
+        if match is not None:
+            continue
+        entry = {**entry, "ID": len(kept)+1}
+        if clusters[entry["URL"]]:
+            entry["Duplicates"] = [member["key"] for member in clusters[entry["URL"]]]
+        kept.append(entry)
+    incr('duplicates_dropped', len(entries) - len(kept))
+    return kept, [
+        {"representative": key, "members": members} for key, members in clusters.items() if members
+    ]
+
+
+def dedup_articles(articles: Iterable[Article], threshold: float = CONTENT_THRESHOLD) -> List[dict]:
+    """
+    Content-level dedup of scraped articles, in place.
+
+    Duplicates keep their metadata but have their content dropped and
+    'duplicate_of' set to the ID of the first article of their cluster, which
+    lists them with their similarity in 'duplicates'. Copies of the same
+    article (the same URL requested twice) are not duplicates of each other and
+    share the outcome of their first copy. Failed scrapes are left alone.
+
+    Returns:
+        List[dict]: one {"representative", "members"} record per cluster with duplicates
+    """
+    articles = [article for article in articles if article.ok]
+    unique = list({article.id: article for article in reversed(articles)}.values())[::-1]
+    index = NearDuplicateIndex(threshold, CONTENT_SHINGLE)
+    clusters, matches = _clusters(
+        unique, index, lambda article: article.id, lambda article: article.title + '\n' + article.content
+    )
+    match_by_id = {article.id: match for article, match in zip(unique, matches)}
+    dropped = 0
+    for article in articles:
+        match = match_by_id[article.id]
+        if match is not None:
+            article.duplicate_of = match[0]
+            article.content = ""
+            dropped += 1
+        elif clusters[article.id]:
+            article.duplicates = [{"id": member["key"], "similarity": member["similarity"]} for member in clusters[article.id]]
+    incr('duplicates_dropped', dropped)
+    return [{"representative": key, "members": members} for key, members in clusters.items() if members]
@@ -0,0 +1,187 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from src.fetch_backend import USER_AGENT
+from src.metrics import incr, span
+
+
+DEFAULT_POOL_SIZE = int(os.environ.get('WSCN_DRIVER_POOL_SIZE', 3))
+DEFAULT_RECYCLE_AFTER = int(os.environ.get('WSCN_DRIVER_RECYCLE_AFTER', 50))
+DEFAULT_ACQUIRE_TIMEOUT = 60
+
+
+def article_chrome_options() -> Options:
+    """Chrome options for article pages, which render without JavaScript"""
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-extensions')
+    chrome_options.add_argument('--disable-images')  # Faster loading
+    chrome_options.add_argument('--disable-css')    # Skip CSS loading
+    chrome_options.add_argument('--disable-plugins')
+    chrome_options.add_argument('--disable-javascript')  # Skip JS if not needed
+    chrome_options.add_argument(f'user-agent={USER_AGENT}')
+    chrome_options.add_argument('--page-load-strategy=eager')  # Don't wait for all resources
+    return chrome_options
+
+
+def listing_chrome_options() -> Options:
+    """Chrome options for listing pages, which need JavaScript for infinite scroll"""
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument(f'user-agent={USER_AGENT}')
+    return chrome_options
+
+
+class DriverPool:
+    """
+    Bounded pool of long-lived WebDrivers.
+
+    Drivers are created lazily up to 'size', health-checked when handed out and
+    recycled after serving 'recycle_after' pages so Chrome's memory growth stays
+    bounded.
+    """
+
+    def __init__(self, options_factory, size: int = DEFAULT_POOL_SIZE, recycle_after: int = DEFAULT_RECYCLE_AFTER, page_load_timeout: int = 20):
+        self.options_factory = options_factory
+        self.size = size
+        self.recycle_after = recycle_after
+        self.page_load_timeout = page_load_timeout
+        self._idle = queue.LifoQueue()
+        self._uses = {}
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _create(self):
+        with span('driver_start'):
+            driver = webdriver.Chrome(options=self.options_factory())
+        incr('driver_starts')
+        driver.set_page_load_timeout(self.page_load_timeout)
+        self._uses[id(driver)] = 0
+        return driver
+
+    def _discard(self, driver):
+        self._uses.pop(id(driver), None)
+        incr('driver_recycles')
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    @staticmethod
+    def _is_healthy(driver) -> bool:
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, timeout: float = DEFAULT_ACQUIRE_TIMEOUT):
+        """Take a healthy driver from the pool, starting one if below capacity"""
+        while True:
+            if self._closed:
+                raise RuntimeError("driver pool is shut down")
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        return self._create()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                try:
+                    driver = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"no driver became available within {timeout}s (pool size {self.size})") from None
+
+            if self._is_healthy(driver):
+                return driver
+            self._discard(driver)
+
+    def release(self, driver, broken: bool = False):
+        """Return a driver to the pool, quitting it if broken or due for recycling"""
+        uses = self._uses.get(id(driver), 0) + 1
+        self._uses[id(driver)] = uses
+        if broken or self._closed or uses >= self.recycle_after:
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+
+    @contextmanager
+    def driver(self, timeout: float = DEFAULT_ACQUIRE_TIMEOUT):
+        """Context manager lending a driver for the duration of one page"""
+        driver = self.acquire(timeout)
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = not self._is_healthy(driver)
+            raise
+        finally:
+            self.release(driver, broken)
+
+    def warm_up(self, count: int = 1):
+        """Start up to 'count' drivers ahead of the first request"""
+        drivers = []
+        try:
+            for _ in range(min(count, self.size)):
+                drivers.append(self.acquire())
+        finally:
+            for driver in drivers:
+                self._idle.put(driver)
+
+    def shutdown(self):
+        """Quit every idle driver; drivers in use are quit when released"""
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+# Process-wide pools, one per Chrome profile
+_pools = {}
+_pools_lock = threading.Lock()
+
+POOL_OPTIONS = {
+    'article': article_chrome_options,
+    'listing': listing_chrome_options,
+}
+
+
+def get_driver_pool(kind: str = 'article') -> DriverPool:
+    """Get or create the process-wide driver pool for 'article' or 'listing' pages"""
+    with _pools_lock:
+        pool = _pools.get(kind)
+        if pool is None or pool._closed:
+            pool = _pools[kind] = DriverPool(POOL_OPTIONS[kind])
+        return pool
+
+
+def shutdown_driver_pools():
+    """Quit every pooled driver, e.g. when the MCP server exits"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import weakref
+import httpx
+from src.fetch_scheduler import Deadline, get_fetch_scheduler
+from src.metrics import incr, span
+
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+DEFAULT_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+}
+
+# Available fetch backends, in order of preference
+FETCH_BACKENDS = ('http', 'selenium')
+
+# Process-wide pooled HTTP client shared by all worker threads
+_client = None
+_client_lock = threading.Lock()
+
+# Async clients are bound to the event loop that created them
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_http_client() -> httpx.Client:
+    """Get or create the shared keep-alive HTTP client (HTTP/2, gzip/brotli)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(
+                    http2=True,
+                    headers=DEFAULT_HEADERS,
+                    follow_redirects=True,
+                    timeout=httpx.Timeout(10.0, connect=5.0),
+                    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                )
+    return _client
+
+
+def close_http_client():
+    """Close the shared HTTP client and release its pooled connections"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            try:
+                _client.close()
+            finally:
+                _client = None
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Get or create the pooled async HTTP client of the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=True,
+            headers=DEFAULT_HEADERS,
+            follow_redirects=True,
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_async_http_client():
+    """Close the async HTTP client of the running event loop"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def fetch_html(url: str, deadline: Deadline = None) -> str:
+    """Fetch the raw HTML of a page over the pooled HTTP client"""
+    with span('http_fetch'):
+        response = get_fetch_scheduler().request(get_http_client(), url, deadline)
+    incr('fetch_bytes', len(response.content))
+    response.raise_for_status()
+    return response.text
+
+
+def fetch_html_conditional(url: str, etag: str = None, last_modified: str = None, deadline: Deadline = None):
+    """
+    Fetch a page with conditional request headers, through the fetch scheduler
+
+    Returns:
+        tuple: (html, etag, last_modified), where html is None on 304 Not Modified
+    """
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    
+    with span('http_fetch'):
+        response = get_fetch_scheduler().request(get_http_client(), url, deadline, headers=headers)
+    incr('fetch_bytes', len(response.content))
+    if response.status_code == 304:
+        incr('not_modified')
+        return None, etag, last_modified
+    response.raise_for_status()
+    return response.text, response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+
+def fetch_json(url: str, params: dict = None, deadline: Deadline = None):
+    """Fetch and decode a JSON document over the pooled HTTP client"""
+    with span('feed_fetch'):
+        response = get_fetch_scheduler().request(
+            get_http_client(), url, deadline, params=params, headers={'Accept': 'application/json'}
+        )
+    incr('fetch_bytes', len(response.content))
+    response.raise_for_status()
+    return response.json()
@@ -0,0 +1,338 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import httpx
+
+from src.metrics import incr
+
+
+# Politeness and resilience defaults, overridable through the environment
+DEFAULT_RATE = float(os.environ.get('WSCN_RATE_LIMIT', 5.0))
+DEFAULT_BURST = int(os.environ.get('WSCN_RATE_BURST', 5))
+DEFAULT_MAX_RETRIES = int(os.environ.get('WSCN_MAX_RETRIES', 2))
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 8.0
+DEFAULT_BREAKER_THRESHOLD = int(os.environ.get('WSCN_BREAKER_THRESHOLD', 5))
+DEFAULT_BREAKER_RESET = float(os.environ.get('WSCN_BREAKER_RESET', 30.0))
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# Transport errors about the request itself, which no retry can fix and which say nothing about the host
+PERMANENT_ERRORS = (httpx.UnsupportedProtocol, httpx.LocalProtocolError)
+
+# Per-attempt timeouts, matching the pooled clients' defaults
+REQUEST_TIMEOUT = 10.0
+CONNECT_TIMEOUT = 5.0
+
+
+class DeadlineExceeded(TimeoutError):
+    """The batch deadline passed before the request could complete"""
+
+
+class CircuitOpenError(RuntimeError):
+    """Requests to a host are suspended after repeated failures"""
+
+
+class Deadline:
+    """Absolute deadline shared by every request of a batch"""
+
+    __slots__ = ('expires_at',)
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def after(cls, seconds: float = None):
+        """Deadline 'seconds' from now, or None for no deadline"""
+        return cls(seconds) if seconds is not None else None
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def check(self):
+        if self.remaining() <= 0:
+            raise DeadlineExceeded("batch deadline exceeded")
+
+
+class HostRateLimiter:
+    """
+    Per-host token bucket shared by threads and event loops.
+
+    reserve() takes a token immediately and returns how long the caller must
+    wait before using it, so concurrent callers queue up in order instead of
+    polling.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, host: str) -> float:
+        if self.rate <= 0:
+            # A non-positive rate disables limiting
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(host, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate) - 1
+            self._buckets[host] = (tokens, now)
+        return -tokens / self.rate if tokens < 0 else 0.0
+
+    def release(self, host: str):
+        """Give back a token reserved for a request that was never sent"""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            tokens, last = self._buckets[host]
+            self._buckets[host] = (tokens + 1, last)
+
+
+class CircuitBreaker:
+    """
+    Opens after 'failure_threshold' consecutive failures, rejecting requests for
+    'reset_timeout' seconds; then lets a single trial request through and
+    closes again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_BREAKER_THRESHOLD, reset_timeout: float = DEFAULT_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.reset_timeout else 'open'
+
+    def before_request(self, host: str):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return
+            if state == 'half-open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+        incr('circuit_rejections')
+        raise CircuitOpenError(f"circuit open for {host} after {self.failures} consecutive failures")
+
+    def cancel_trial(self):
+        """Give back the half-open trial slot when the request never reached the host"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial_in_flight:
+                    incr('circuit_opens')
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+def _retry_after(response) -> float:
+    """Seconds requested by a Retry-After header, or None"""
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _detach_stream(response: httpx.Response) -> httpx.Response:
+    """
+    Drop a fully read response's reference to its stream, which refers back to
+    the response: without this the cycle keeps the body alive until the next
+    cyclic garbage collection instead of freeing it with the last reference.
+    """
+    response.stream = httpx.ByteStream(b'')
+    return response
+
+
+class FetchScheduler:
+    """
+    Runs HTTP requests under a per-host rate limit, retrying timeouts, transient
+    transport errors, 429 and 5xx responses with jittered exponential backoff, behind a
+    per-host circuit breaker, and never past the caller's deadline.
+
+    The same scheduler serves the thread pool (request) and event loops (arequest).
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE, backoff_max: float = DEFAULT_BACKOFF_MAX,
+                 failure_threshold: int = DEFAULT_BREAKER_THRESHOLD, reset_timeout: float = DEFAULT_BREAKER_RESET):
+        self.limiter = HostRateLimiter(rate, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def batch_limiter(self, rate: float = None):
+        """
+        Extra per-host limiter for a batch asking for fewer requests/s than the
+        shared limiter allows, or None: a batch may only tighten the shared limit
+        """
+        if rate is None or rate <= 0 or 0 < self.limiter.rate <= rate:
+            return None
+        return HostRateLimiter(rate, max(1, int(rate)))
+
+    def _before_attempt(self, host, deadline, limiter):
+        """
+        Check the deadline and breaker, then reserve rate-limit tokens; return
+        the wait before sending and the request timeout. Tokens are only kept
+        by requests that will be sent.
+        """
+        if deadline is not None:
+            deadline.check()
+        breaker = self.breaker(host)
+        breaker.before_request(host)
+        limiters = [self.limiter] if limiter is None else [self.limiter, limiter]
+        wait = max(bucket.reserve(host) for bucket in limiters)
+        timeout = httpx.USE_CLIENT_DEFAULT
+        if deadline is not None:
+            remaining = deadline.remaining() - wait
+            if remaining <= 0:
+                for bucket in limiters:
+                    bucket.release(host)
+                breaker.cancel_trial()
+                raise DeadlineExceeded("batch deadline exceeded")
+            timeout = httpx.Timeout(min(REQUEST_TIMEOUT, remaining), connect=min(CONNECT_TIMEOUT, remaining))
+        return wait, timeout
+
+    def _after_attempt(self, host, attempt, deadline, response=None, error=None):
+        """
+        Record the outcome of an attempt
+
+        Returns:
+            float or None: backoff delay before retrying, or None to stop here
+        """
+        breaker = self.breaker(host)
+        if error is None and response.status_code not in RETRYABLE_STATUS:
+            breaker.record_success()
+            return None
+        breaker.record_failure()
+        if attempt >= self.max_retries or breaker.state != 'closed':
+            return None
+
+        delay = _retry_after(response)
+        if delay is None:
+            # Full jitter keeps concurrent retries from arriving in lockstep
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if deadline is not None and delay >= deadline.remaining():
+            return None
+        incr('retries')
+        return delay
+
+    def request(self, client: httpx.Client, url: str, deadline: Deadline = None, **kwargs) -> httpx.Response:
+        """
+        GET 'url' with 'client', retrying transient failures
+
+        Returns the last response, which may still carry an error status;
+        raises the last transport error, CircuitOpenError or DeadlineExceeded.
+        """
+        host = urlparse(url).netloc
+        attempt = 0
+        while True:
+            wait, timeout = self._before_attempt(host, deadline, None)
+            response = error = None
+            try:
+                if wait:
+                    time.sleep(wait)
+                response = _detach_stream(client.get(url, timeout=timeout, **kwargs))
+            except PERMANENT_ERRORS:
+                self.breaker(host).cancel_trial()
+                raise
+            except httpx.TransportError as e:
+                error = e
+            except BaseException:
+                self.breaker(host).cancel_trial()
+                raise
+            delay = self._after_attempt(host, attempt, deadline, response, error)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            time.sleep(delay)
+            attempt += 1
+
+    async def arequest(self, client: httpx.AsyncClient, url: str, deadline: Deadline = None, limiter: HostRateLimiter = None, **kwargs) -> httpx.Response:
+        """Async counterpart of request(); 'limiter' is an optional batch_limiter applied on top of the shared one"""
+        host = urlparse(url).netloc
+        attempt = 0
+        while True:
+            wait, timeout = self._before_attempt(host, deadline, limiter)
+            response = error = None
+            try:
+                if wait:
+                    await asyncio.sleep(wait)
+                response = _detach_stream(await client.get(url, timeout=timeout, **kwargs))
+            except PERMANENT_ERRORS:
+                self.breaker(host).cancel_trial()
+                raise
+            except httpx.TransportError as e:
+                error = e
+            except BaseException:
+                self.breaker(host).cancel_trial()
+                raise
+            delay = self._after_attempt(host, attempt, deadline, response, error)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+# Process-wide scheduler, created on first use
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_fetch_scheduler() -> FetchScheduler:
+    """Get or create the process-wide fetch scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = FetchScheduler()
+    return _scheduler
+
+
+def set_fetch_scheduler(scheduler: FetchScheduler):
+    """Replace the process-wide fetch scheduler, e.g. with different limits"""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
@@ -0,0 +1,163 @@
+"""
+Local stand-in for wallstreetcn.com that serves recorded fixtures, so the
+scrapers can be run, tested and benchmarked offline.
+
+Routes:
+    /apiv1/content/information-flow   recorded feed pages, by channel and cursor
+    /news/<channel>                   recorded listing page
+    /articles/<id>                    recorded article page (any ID)
+"""
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures')
+
+FEED_PATH = '/apiv1/content/information-flow'
+
+LISTING_PATH_PATTERN = re.compile(r'^/news/([\w-]+)/?$')
+ARTICLE_PATH_PATTERN = re.compile(r'^/articles/(\d+)/?$')
+DATETIME_ATTR_PATTERN = re.compile(r'datetime="([^"]+)"')
+
+
+def _recorded_at(channel: str) -> int:
+    with open(os.path.join(FIXTURES_DIR, f'information_flow_{channel}.json'), encoding='utf-8') as f:
+        return json.load(f)['recorded_at']
+
+
+def load_feed_fixture(channel: str = 'global', rebase_time: bool = True) -> dict:
+    """
+    Load a recorded information-flow fixture as a mapping of cursor -> response.
+
+    With rebase_time, every display_time is shifted so the newest item is
+    published "now", keeping time filters meaningful for old recordings.
+    """
+    with open(os.path.join(FIXTURES_DIR, f'information_flow_{channel}.json'), encoding='utf-8') as f:
+        fixture = json.load(f)
+
+    pages = fixture['pages']
+    if rebase_time:
+        shift = int(time.time()) - fixture['recorded_at']
+        for page in pages.values():
+            for item in page['data']['items']:
+                if 'display_time' in item['resource']:
+                    item['resource']['display_time'] += shift
+    return pages
+
+
+def load_listing_fixture(channel: str = 'global', rebase_time: bool = True) -> str:
+    """Load a recorded listing page, shifting its datetime attributes like load_feed_fixture"""
+    with open(os.path.join(FIXTURES_DIR, f'news_{channel}.html'), encoding='utf-8') as f:
+        html = f.read()
+
+    if rebase_time:
+        shift = timedelta(seconds=int(time.time()) - _recorded_at(channel))
+        html = DATETIME_ATTR_PATTERN.sub(
+            lambda m: 'datetime="%s"' % (datetime.fromisoformat(m.group(1)) + shift).isoformat(timespec='milliseconds'),
+            html
+        )
+    return html
+
+
+def load_article_fixture() -> str:
+    with open(os.path.join(FIXTURES_DIR, 'article.html'), encoding='utf-8') as f:
+        return f.read()
+
+
+def make_handler(feeds: dict, listings: dict = None, article_html: str = None, latency_ms: float = 0, jitter_ms: float = 0):
+    """
+    Build a request handler class serving the given fixtures
+
+    Every response is delayed by latency_ms plus a uniform random jitter of up
+    to jitter_ms, to approximate a remote site.
+    """
+    listings = listings or {}
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        # Keep-alive, so pooled clients reuse connections as they would in production
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            delay = latency_ms + random.uniform(0, jitter_ms)
+            if delay > 0:
+                time.sleep(delay / 1000)
+
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+
+            if parsed.path == FEED_PATH:
+                channel = query.get('channel', ['global-channel'])[0].removesuffix('-channel')
+                cursor = query.get('cursor', [''])[0]
+                page = feeds.get(channel, {}).get(cursor)
+                if page is None:
+                    page = {"code": 20000, "message": "OK", "data": {"items": [], "next_cursor": ""}}
+                self._send(200, 'application/json; charset=utf-8', json.dumps(page, ensure_ascii=False))
+                return
+
+            match = LISTING_PATH_PATTERN.match(parsed.path)
+            if match and match.group(1) in listings:
+                self._send(200, 'text/html; charset=utf-8', listings[match.group(1)])
+                return
+
+            if ARTICLE_PATH_PATTERN.match(parsed.path) and article_html is not None:
+                self._send(200, 'text/html; charset=utf-8', article_html)
+                return
+
+            self._send(404, 'text/plain; charset=utf-8', 'Not Found')
+
+        def _send(self, status, content_type, body):
+            payload = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+def start_fixture_server(host: str = '127.0.0.1', port: int = 0, channels=('global',), latency_ms: float = 0, jitter_ms: float = 0):
+    """
+    Start the fixture server on a background thread.
+
+    Returns:
+        tuple: (server, base_url). Call server.shutdown() to stop it.
+    """
+    feeds = {channel: load_feed_fixture(channel) for channel in channels}
+    listings = {
+        channel: load_listing_fixture(channel) for channel in channels
+        if os.path.exists(os.path.join(FIXTURES_DIR, f'news_{channel}.html'))
+    }
+    handler = make_handler(feeds, listings, load_article_fixture(), latency_ms, jitter_ms)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    args = parser.parse_args()
+
+    server, base_url = start_fixture_server(port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    print(f"Serving fixtures at {base_url} (feed: {base_url}{FEED_PATH})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
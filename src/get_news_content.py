@@ -1,254 +1,455 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException
+import httpx
+import lxml.html
+from lxml import etree
+import copy
+import re
 import time
 import concurrent.futures
-import threading
-from typing import List, Dict
-
-
-# Thread-local storage for WebDriver instances
-thread_local = threading.local()
-
-
-def get_driver():
-    """Get or create a WebDriver instance for the current thread"""
-    if not hasattr(thread_local, 'driver'):
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-extensions')
-        chrome_options.add_argument('--disable-images')  # Faster loading
-        chrome_options.add_argument('--disable-css')    # Skip CSS loading
-        chrome_options.add_argument('--disable-plugins')
-        chrome_options.add_argument('--disable-javascript')  # Skip JS if not needed
-        chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-        chrome_options.add_argument('--page-load-strategy=eager')  # Don't wait for all resources
-        
-        thread_local.driver = webdriver.Chrome(options=chrome_options)
-        thread_local.driver.implicitly_wait(5)  # Reduced wait time
-        thread_local.driver.set_page_load_timeout(20)  # Set page load timeout
-    
-    return thread_local.driver
+from typing import Iterator, List, Tuple
+from src.fetch_backend import FETCH_BACKENDS, fetch_html, fetch_html_conditional
+from src.fetch_scheduler import Deadline, DeadlineExceeded
+from src.driver_pool import get_driver_pool
+from src.article_cache import ArticleCache, article_id_from_url, canonical_article_url
+from src.article import Article
+from src.search_index import SearchIndex
+from src.single_flight import SingleFlight
+from src.metrics import collect_timings, incr, span
+
+
+# Precompiled extraction plan, equivalent to the CSS selectors it replaces
+_ARTICLE = etree.XPath('(//article)[1]')
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# 'article h1', 'h1.article-title', 'h1'
+_TITLE_PLAN = [
+    etree.XPath('(//article//h1)[1]'),
+    etree.XPath(f'(//h1[{_has_class("article-title")}])[1]'),
+    etree.XPath('(//h1)[1]'),
+]
+
+# 'article time[datetime]', 'article .date', 'article .published-date', 'article .post-date', 'time[datetime]'
+_DATE_PLAN = [
+    etree.XPath('(//article//time[@datetime])[1]'),
+    etree.XPath(f'(//article//*[{_has_class("date")}])[1]'),
+    etree.XPath(f'(//article//*[{_has_class("published-date")}])[1]'),
+    etree.XPath(f'(//article//*[{_has_class("post-date")}])[1]'),
+    etree.XPath('(//time[@datetime])[1]'),
+]
+
+# Nodes skipped while walking the article body
+UNWANTED_TAGS = frozenset({'script', 'style', 'h1', 'time', 'nav'})
+UNWANTED_CLASSES = frozenset({
+    'date', 'published-date', 'post-date', 'ad', 'advertisement',
+    'related-articles', 'comments', 'social-share', 'author-info'
+})
+
+
+def _is_unwanted(element) -> bool:
+    if not isinstance(element.tag, str):
+        # Comments and processing instructions carry no content
+        return True
+    if element.tag in UNWANTED_TAGS:
+        return True
+    classes = element.get('class')
+    return bool(classes) and not UNWANTED_CLASSES.isdisjoint(classes.split())
+
 
+class _Tail:
+    """Stack marker emitting an element's tail once its children are walked"""
+    __slots__ = ('text',)
+    tag = None
 
-def cleanup_driver():
-    """Clean up the WebDriver instance for the current thread"""
-    if hasattr(thread_local, 'driver'):
+    def __init__(self, text):
+        self.text = text
+
+
+def _iter_strings(root, skip=None):
+    """Yield the text nodes under root in document order, skipping subtrees for which skip() is true"""
+    if root.text:
+        yield root.text
+    stack = list(reversed(root))
+    while stack:
+        element = stack.pop()
+        if isinstance(element.tag, str) and not (skip and skip(element)):
+            if element.text:
+                yield element.text
+            # Children are visited before this element's tail
+            stack.append(_Tail(element.tail))
+            stack.extend(reversed(element))
+        elif isinstance(element, _Tail):
+            if element.text:
+                yield element.text
+        elif element.tail:
+            yield element.tail
+
+
+def _first(plan, tree):
+    for xpath in plan:
+        found = xpath(tree)
+        if found:
+            return found[0]
+    return None
+
+
+# Tags bounding the article region, which is parsed on its own before falling back to the whole page.
+# Comments and raw-text elements are matched whole so markup quoted inside them is skipped.
+_ARTICLE_TAGS = re.compile(
+    r'<!--.*?(?:-->|\Z)'
+    r'|<(script|style|textarea|title)\b.*?(?:</\1\s*>|\Z)'
+    r'|<(?P<close>/?)article\b[^>]*>',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Plan steps that only look inside <article>, and so give the same answer on the article region alone
+_SCOPED_TITLE_PLAN = _TITLE_PLAN[:1]
+_SCOPED_DATE_PLAN = _DATE_PLAN[:4]
+
+
+def _article_fragment(html: str):
+    """The HTML of the first <article> element, outside comments and scripts, or None if it is not closed"""
+    depth = 0
+    start = None
+    for match in _ARTICLE_TAGS.finditer(html):
+        closing = match.group('close')
+        if closing is None:
+            continue
+        if not closing:
+            if depth == 0:
+                start = match.start()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                return html[start:match.end()]
+    return None
+
+
+def _parse_tree(html: str):
+    with span('parse'):
         try:
-            thread_local.driver.quit()
-        except:
-            pass
-        finally:
-            delattr(thread_local, 'driver')
+            return lxml.html.fromstring(html)
+        except ValueError:
+            # Strings carrying an XML encoding declaration must be parsed as bytes
+            return lxml.html.fromstring(html.encode('utf-8'))
 
 
-def scrape_single_url(url: str) -> str:
-    """Scrape content from a single URL using thread-local WebDriver"""
-    driver = get_driver()
+def _extract(tree, url: str, title_plan, date_plan):
+    found = _ARTICLE(tree)
+    if not found:
+        return None
+    article_section = found[0]
     
-    try:
-        # Load the page with timeout
+    article = Article(id=article_id_from_url(url), url=url)
+    
+    title_element = _first(title_plan, tree)
+    if title_element is not None:
+        article.title = ''.join(text.strip() for text in _iter_strings(title_element))
+    
+    date_element = _first(date_plan, tree)
+    if date_element is not None:
+        article.published_at = date_element.get('datetime') or ''.join(text.strip() for text in _iter_strings(date_element))
+    
+    # Walk the article subtree once, skipping unwanted nodes instead of removing them
+    with span('extract'):
+        lines = []
+        for text in _iter_strings(article_section, _is_unwanted):
+            for line in text.split('\n'):
+                line = line.strip()
+                if line:
+                    lines.append(line)
+        article.content = '\n'.join(lines)
+    
+    return article
+
+
+def parse_article_html(html: str, url: str):
+    """
+    Parse article HTML into an Article, or return None if it has no <article>
+    
+    Only the <article> region of the page is parsed when it yields the title,
+    date and content on its own, which keeps the tree (and the time spent
+    building it) to a fraction of a full page with its navigation and
+    scripts. Otherwise the whole page is parsed, with the page-wide fallbacks.
+    The tree is discarded as soon as the fields are extracted.
+    """
+    if not html or not html.strip():
+        return None
+    
+    fragment = _article_fragment(html)
+    if fragment is not None:
+        article = _extract(_parse_tree(fragment), url, _SCOPED_TITLE_PLAN, _SCOPED_DATE_PLAN)
+        if article is not None and article.title and article.published_at and article.content:
+            return article
+        incr('full_page_parses')
+    
+    return _extract(_parse_tree(html), url, _TITLE_PLAN, _DATE_PLAN)
+
+
+# Scrapes in flight anywhere in the process, keyed by (article ID, backend)
+in_flight_scrapes = SingleFlight()
+
+
+def fetch_with_driver(driver, url: str) -> str:
+    """Load a page in a WebDriver and return its HTML once the <article> is present"""
+    with span('driver_get'):
         driver.get(url)
-        
-        # Wait for article element with shorter timeout
+    
+    # Wait for article element with shorter timeout
+    with span('driver_wait'):
         WebDriverWait(driver, 5).until(
             EC.presence_of_element_located((By.TAG_NAME, 'article'))
         )
+    
+    return driver.page_source
+
+
+def fetch_with_pool(url: str) -> str:
+    """Render a page with a driver borrowed from the process-wide article pool"""
+    with get_driver_pool('article').driver() as driver:
+        return fetch_with_driver(driver, url)
+
+
+def article_from_cache_entry(entry):
+    """Decode a cache entry, treating payloads from older formats as misses"""
+    try:
+        article = Article.from_json(entry["payload"])
+    except (ValueError, TypeError):
+        return None
+    article.from_cache = True
+    article.fetch_ms = article.parse_ms = 0.0
+    return article
+
+
+def scrape_single_url(url: str, backend: str = 'http', cache: ArticleCache = None, deadline: Deadline = None) -> Article:
+    """
+    Scrape content from a single URL
+    
+    The 'http' backend fetches the static HTML over the pooled HTTP client and
+    only falls back to a pooled WebDriver when that HTML has no <article>.
+    The 'selenium' backend always renders the page in the browser.
+    
+    HTTP fetches go through the fetch scheduler (rate limit, retries, circuit
+    breaker) and stop at 'deadline' if given.
+    With a cache, fresh entries are returned without any fetch and stale ones
+    are revalidated with a conditional request when the backend is 'http'.
+    Failures are returned as an Article with status 'error'.
+    
+    The URL is canonicalised first, and concurrent calls for the same article
+    ID and backend share a single scrape; each caller gets its own copy.
+    """
+    url = canonical_article_url(url)
+    article_id = article_id_from_url(url)
+    
+    def scrape():
+        with collect_timings() as timings:
+            article = _scrape_single_url(url, backend, cache, deadline)
+        article.timings = timings
+        return article
+    
+    try:
+        article = in_flight_scrapes.do((article_id, backend), scrape, deadline.remaining() if deadline is not None else None)
+    except TimeoutError:
+        return Article.failed(article_id, url, DeadlineExceeded("batch deadline exceeded"))
+    return copy.copy(article)
+
+
+def unique_articles(urls: List[str]) -> Tuple[List[str], List[List[int]]]:
+    """
+    Group a batch of URLs by article ID
+    
+    Returns:
+        (urls, positions): one canonical URL per distinct article, in order of
+        first appearance, and the input indices each of them was requested at
+    """
+    groups = {}
+    for index, url in enumerate(urls):
+        url = canonical_article_url(url)
+        groups.setdefault(article_id_from_url(url), (url, []))[1].append(index)
+    if len(groups) < len(urls):
+        incr('batch_duplicates', len(urls) - len(groups))
+    return [url for url, _ in groups.values()], [positions for _, positions in groups.values()]
+
+
+def fan_out(article: Article, positions: List[int]) -> Iterator[Tuple[int, Article]]:
+    """Yield an article for every position it was requested at, copying it for all but the first"""
+    yield positions[0], article
+    for index in positions[1:]:
+        yield index, copy.copy(article)
+
+
+def _scrape_single_url(url: str, backend: str, cache: ArticleCache, deadline: Deadline) -> Article:
+    article_id = article_id_from_url(url)
+    if backend not in FETCH_BACKENDS:
+        return Article.failed(article_id, url, f"unknown fetch backend '{backend}'")
+    
+    try:
+        entry = cache.lookup(article_id) if cache is not None else None
+        cached = article_from_cache_entry(entry) if entry else None
+        if cached is not None and entry["fresh"]:
+            return cached
         
-        # Get page source and parse with BeautifulSoup
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        
-        # Initialize data dictionary
-        article_data = {
-            "title": "",
-            "date": "",
-            "content": "",
-            "source_url": url
-        }
-        
-        # Extract title - optimized selectors
-        title_selectors = ['article h1', 'h1.article-title', 'h1']
-        for selector in title_selectors:
-            title_element = soup.select_one(selector)
-            if title_element:
-                article_data["title"] = title_element.get_text(strip=True)
-                break
+        article = None
+        etag = last_modified = None
+        fetch_ms = parse_ms = 0.0
         
-        # Extract date - optimized selectors
-        date_selectors = [
-            'article time[datetime]',
-            'article .date', 
-            'article .published-date',
-            'article .post-date',
-            'time[datetime]'
-        ]
+        if backend == 'http':
+            started = time.perf_counter()
+            if cached is not None:
+                html, etag, last_modified = fetch_html_conditional(url, entry["etag"], entry["last_modified"], deadline)
+                if html is None:
+                    # 304 Not Modified, the cached copy is still current
+                    cache.touch(article_id)
+                    return cached
+            else:
+                html, etag, last_modified = fetch_html_conditional(url, deadline=deadline)
+            parsing = time.perf_counter()
+            article = parse_article_html(html, url)
+            fetch_ms = (parsing - started) * 1000
+            parse_ms = (time.perf_counter() - parsing) * 1000
         
-        for selector in date_selectors:
-            date_element = soup.select_one(selector)
-            if date_element:
-                article_data["date"] = date_element.get('datetime') or date_element.get_text(strip=True)
-                break
+        # Browser fallback when the static HTML lacks an <article>
+        if article is None:
+            if deadline is not None:
+                deadline.check()
+            started = time.perf_counter()
+            html = fetch_with_pool(url)
+            parsing = time.perf_counter()
+            article = parse_article_html(html, url)
+            fetch_ms += (parsing - started) * 1000
+            parse_ms += (time.perf_counter() - parsing) * 1000
         
-        # Extract content more efficiently
-        article_section = soup.select_one('article')
-        if article_section:
-            # Remove unwanted elements in one go
-            unwanted_selectors = [
-                'script', 'style', 'h1', 'time', '.date', '.published-date', 
-                '.post-date', '.ad', '.advertisement', '.related-articles', 
-                '.comments', '.social-share', '.author-info', 'nav'
-            ]
-            
-            for selector in unwanted_selectors:
-                for element in article_section.select(selector):
-                    element.decompose()
-            
-            # Get clean text content
-            content_text = article_section.get_text(separator='\n', strip=True)
-            
-            # Clean up excessive whitespace and newlines
-            lines = [line.strip() for line in content_text.split('\n') if line.strip()]
-            article_data["content"] = '\n'.join(lines)
+        if article is None:
+            raise ValueError("no <article> element found")
         
-        return str(article_data)
+        article.fetch_ms = fetch_ms
+        article.parse_ms = parse_ms
+        if cache is not None:
+            cache.put(article_id, url, article.to_json(), etag, last_modified)
+        return article
     
     except Exception as e:
-        return f"Error processing {url}: {str(e)}"
+        incr('errors')
+        if isinstance(e, (TimeoutException, httpx.TimeoutException, TimeoutError)):
+            incr('timeouts')
+        return Article.failed(article_id, url, e)
 
 
-def get_news_data(urls: List[str], max_workers: int = 3) -> List[str]:
+def iter_news_data(urls: List[str], max_workers: int = 3, backend: str = 'http', cache: ArticleCache = None, search_index: SearchIndex = None, timeout: float = None) -> Iterator[Tuple[int, Article]]:
     """
-    Process a list of URLs concurrently and return a list of scraped news results
+    Process a list of URLs concurrently, yielding each result as soon as it is parsed
+    
+    URLs naming the same article are scraped once and the result is yielded
+    for every index it was requested at.
     
     Args:
         urls (List[str]): List of URLs to scrape
         max_workers (int): Maximum number of concurrent threads (default: 3)
+        backend (str): Fetch backend, 'http' (default) or 'selenium'
+        cache (ArticleCache): Optional article cache consulted before fetching
+        search_index (SearchIndex): Optional full-text index that freshly fetched articles are added to
+        timeout (float): Optional deadline in seconds for the whole batch; articles not fetched by then fail
     
-    Returns:
-        List[str]: List of scraped article data as strings
+    Yields:
+        Tuple[int, Article]: Index of the URL in the input list and its scraped article
     """
     if not urls:
-        return []
+        return
     
-    # Limit concurrent workers to avoid overwhelming the target server
-    max_workers = min(max_workers, len(urls), 5)  # Cap at 5 to be respectful
+    # Each article is scraped once, however many times (and in whichever URL form) it is requested
+    unique_urls, positions = unique_articles(urls)
     
-    results = []
+    # Limit concurrent workers; the fetch scheduler's per-host rate limit does the pacing
+    max_workers = min(max_workers, len(unique_urls), 5)
+    deadline = Deadline.after(timeout)
     
+    # Browser drivers come from the process-wide pool and outlive this call
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
     try:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all tasks
-            future_to_url = {executor.submit(scrape_single_url, url): url for url in urls}
-            
-            # Collect results as they complete
-            for future in concurrent.futures.as_completed(future_to_url):
-                url = future_to_url[future]
-                try:
-                    result = future.result(timeout=30)  # 30 second timeout per URL
-                    results.append(result)
-                except Exception as e:
-                    results.append(f"Error processing {url}: {str(e)}")
+        # Submit all tasks
+        future_to_index = {executor.submit(scrape_single_url, url, backend, cache, deadline): i for i, url in enumerate(unique_urls)}
+        
+        # Yield results as they complete
+        for future in concurrent.futures.as_completed(future_to_index):
+            # Finished futures are dropped so yielded articles are not kept alive by this batch
+            index = future_to_index.pop(future)
+            try:
+                article = future.result()
+            except Exception as e:
+                article = Article.failed(article_id_from_url(unique_urls[index]), unique_urls[index], e)
+            # Cache hits were indexed when they were first fetched
+            if search_index is not None and article.ok and not article.from_cache:
+                search_index.add(article)
+            yield from fan_out(article, positions[index])
     
     finally:
-        # Clean up all thread-local drivers
-        cleanup_driver()
+        # Drop pending work if the consumer stops early
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_news_data(urls: List[str], max_workers: int = 3, backend: str = 'http', cache: ArticleCache = None, search_index: SearchIndex = None, timeout: float = None) -> List[Article]:
+    """
+    Process a list of URLs concurrently and return a list of scraped news results
     
+    Args:
+        urls (List[str]): List of URLs to scrape
+        max_workers (int): Maximum number of concurrent threads (default: 3)
+        backend (str): Fetch backend, 'http' (default) or 'selenium'
+        cache (ArticleCache): Optional article cache consulted before fetching
+        search_index (SearchIndex): Optional full-text index that freshly fetched articles are added to
+        timeout (float): Optional deadline in seconds for the whole batch; articles not fetched by then fail
+    
+    Returns:
+        List[Article]: Scraped articles, in input order
+    """
+    results = [None] * len(urls)
+    for index, result in iter_news_data(urls, max_workers, backend, cache, search_index, timeout):
+        results[index] = result
     return results
 
 
-def get_news_data_sequential(urls: List[str]) -> List[str]:
+def get_news_data_sequential(urls: List[str], backend: str = 'http') -> List[Article]:
     """
     Sequential version for comparison or when concurrent processing is not desired
     """
     results = []
+    pool = get_driver_pool('article')
     driver = None
     
-    # Set up a single driver for all URLs
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument('--disable-extensions')
-    chrome_options.add_argument('--disable-images')
-    chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-    
     try:
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.implicitly_wait(3)
-        driver.set_page_load_timeout(10)
-        
         for url in urls:
             try:
-                # Load the page
-                driver.get(url)
-                
-                # Wait for article element
-                WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.TAG_NAME, 'article'))
-                )
-                
-                # Process with BeautifulSoup (same logic as concurrent version)
-                soup = BeautifulSoup(driver.page_source, 'html.parser')
-                
-                article_data = {
-                    "title": "",
-                    "date": "",
-                    "content": "",
-                    "source_url": url
-                }
+                if backend not in FETCH_BACKENDS:
+                    raise ValueError(f"unknown fetch backend '{backend}'")
                 
-                # Extract title
-                title_selectors = ['article h1', 'h1.article-title', 'h1']
-                for selector in title_selectors:
-                    title_element = soup.select_one(selector)
-                    if title_element:
-                        article_data["title"] = title_element.get_text(strip=True)
-                        break
+                article = None
                 
-                # Extract date
-                date_selectors = [
-                    'article time[datetime]', 'article .date', 'article .published-date',
-                    'article .post-date', 'time[datetime]'
-                ]
+                if backend == 'http':
+                    article = parse_article_html(fetch_html(url), url)
                 
-                for selector in date_selectors:
-                    date_element = soup.select_one(selector)
-                    if date_element:
-                        article_data["date"] = date_element.get('datetime') or date_element.get_text(strip=True)
-                        break
+                # Browser fallback, a single pooled driver is borrowed when first needed
+                if article is None:
+                    if driver is None:
+                        driver = pool.acquire()
+                    article = parse_article_html(fetch_with_driver(driver, url), url)
                 
-                # Extract content
-                article_section = soup.select_one('article')
-                if article_section:
-                    unwanted_selectors = [
-                        'script', 'style', 'h1', 'time', '.date', '.published-date', 
-                        '.post-date', '.ad', '.advertisement', '.related-articles', 
-                        '.comments', '.social-share', '.author-info', 'nav'
-                    ]
-                    
-                    for selector in unwanted_selectors:
-                        for element in article_section.select(selector):
-                            element.decompose()
-                    
-                    content_text = article_section.get_text(separator='\n', strip=True)
-                    lines = [line.strip() for line in content_text.split('\n') if line.strip()]
-                    article_data["content"] = '\n'.join(lines)
+                if article is None:
+                    raise ValueError("no <article> element found")
                 
-                results.append(str(article_data))
+                results.append(article)
                 
             except Exception as e:
-                results.append(f"Error processing {url}: {str(e)}")
+                results.append(Article.failed(article_id_from_url(url), url, e))
     
     finally:
         if driver:
-            driver.quit()
+            pool.release(driver)
     
     return results
 
@@ -268,7 +469,8 @@ def main():
     end_time = time.time()
     
     print(f"Concurrent processing took {end_time - start_time:.2f} seconds")
-    for data in articles_data:
+    for article in articles_data:
+        data = article.to_json()
         print(data[:200] + "..." if len(data) > 200 else data)
 
 
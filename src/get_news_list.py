@@ -1,177 +1,441 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 import re
-import time
 import json
-from urllib.parse import urljoin
-from datetime import datetime, timedelta
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+from datetime import datetime, timedelta, timezone
+import lxml.html
+from lxml import etree
+from src.article import CST
+from src.article_cache import article_id_from_url
+from src.dedup import dedup_entries
+from src.fetch_backend import fetch_json
+from src.listing_index import get_listing_index
+from src.driver_pool import get_driver_pool
+from src.metrics import span
 
 
-def get_news_entries(url='https://wallstreetcn.com/news/global', time_filter=24):
+# Underlying JSON feed behind the /news/<channel> listing pages
+FEED_API_URL = 'https://api-one-wscn.awtmt.com/apiv1/content/information-flow'
+
+# Available listing engines
+LISTING_ENGINES = ('browser', 'feed')
+
+# Listing sections of the site, served at /news/<channel>
+NEWS_BASE_URL = 'https://wallstreetcn.com'
+NEWS_CHANNELS = ('global', 'china', 'us', 'forex', 'commodities')
+
+
+# Article links on the listing page, on the same host as the listing itself
+NEWS_PATH_PATTERN = re.compile(r'^/articles/\d+$')
+RELATIVE_TIME_PATTERN = re.compile(r'\d+\s+(minute|hour|day|week)s?\s+ago|today at', re.IGNORECASE)
+
+# Precompiled XPath plan for the listing page, evaluated locally on the page source
+_ANCHORS = etree.XPath('//a[@href]')
+_PARENT_DIV = etree.XPath('ancestor::div[1]')
+_TIME_IN_DIV = etree.XPath('.//time')
+_TIME_CLASS_IN_DIV = etree.XPath('.//*[contains(@class, "time") or contains(@class, "date")]')
+_TIME_IN_SIBLINGS = etree.XPath('.//div[2]//time | .//div[contains(@class, "time") or contains(@class, "date")]')
+_TITLE_IN_LINK = etree.XPath('.//*[contains(@class, "title") or self::h1 or self::h2 or self::h3 or self::h4]')
+
+
+def _clean_text(element):
+    return ' '.join(element.text_content().split())
+
+
+def _find_time_element(link):
+    """Find the time element associated with a link, mirroring the listing page structure"""
+    parents = _PARENT_DIV(link)
+    if not parents:
+        return None
+    parent_div = parents[0]
+    
+    # Look for a direct time element, then elements with time-related classes
+    for xpath in (_TIME_IN_DIV, _TIME_CLASS_IN_DIV):
+        found = xpath(parent_div)
+        if found:
+            return found[0]
+    
+    # Then look in the sibling divs of the grandparent
+    grandparent = parent_div.getparent()
+    if grandparent is not None:
+        found = _TIME_IN_SIBLINGS(grandparent)
+        if found:
+            return found[0]
+    
+    # Finally check the parent div's text for relative time patterns
+    if RELATIVE_TIME_PATTERN.search(parent_div.text_content()):
+        return parent_div
+    return None
+
+
+def _extract_title(link, href):
+    title = _clean_text(link)
+    if not title:
+        found = _TITLE_IN_LINK(link)
+        if found:
+            title = _clean_text(found[0])
+    return title or "Article " + href.split('/')[-1]
+
+
+def extract_news_entries(html, url, cutoff_time=None):
+    """
+    在一次解析中从列表页 HTML 中提取新闻条目，所有匹配、时间查找与标题解析均在本地完成。
+    
+    Args:
+        html (str)：列表页的完整 HTML。
+        url (str)：列表页 URL，用于解析相对链接。
+        cutoff_time (datetime, 可选)：如果提供，则跳过早于该时间发布的新闻条目。
+    Returns:
+        list：包含编号，标题，URL的新闻条目列表；能解析到发布时间时附带 'Time' 字段。
+    """
+    news_entries = []
+    if not html:
+        return news_entries
+    
+    listing_host = urlparse(url).netloc
+    tree = lxml.html.fromstring(html)
+    for link in _ANCHORS(tree):
+        try:
+            href = link.get('href')
+            full_url = urljoin(url, href)
+            parsed = urlparse(full_url)
+            if parsed.netloc != listing_host or not NEWS_PATH_PATTERN.match(parsed.path) or parsed.query or parsed.fragment:
+                continue
+            
+            # Look up the publication time, example format: "2025-04-22T21:22:54.000+08:00"
+            post_time = None
+            time_element = _find_time_element(link)
+            if time_element is not None and time_element.get('datetime'):
+                post_time = datetime.fromisoformat(time_element.get('datetime'))
+            
+            # If cutoff_time is provided, skip entries published before it
+            if cutoff_time is not None and post_time is not None:
+                if post_time.astimezone(timezone.utc) < cutoff_time:
+                    continue
+            
+            entry = {
+                # ID starts at 1 rather than 0
+                "ID": len(news_entries)+1,
+                "Title": _extract_title(link, href),
+                "URL": full_url
+            }
+            if post_time is not None:
+                entry["Time"] = post_time.isoformat()
+            news_entries.append(entry)
+        except Exception as e:
+            print(f"Error processing link: {e}", file=sys.stderr)
+            continue
+    
+    return news_entries
+
+
+# Returns [number of article links, oldest datetime in epoch ms or null, whether the known item is loaded]
+SCROLL_STATE_SCRIPT = """
+var oldest = null;
+var times = document.querySelectorAll('time[datetime]');
+for (var i = 0; i < times.length; i++) {
+    var t = Date.parse(times[i].getAttribute('datetime'));
+    if (!isNaN(t) && (oldest === null || t < oldest)) { oldest = t; }
+}
+return [
+    document.querySelectorAll('a[href*="/articles/"]').length,
+    oldest,
+    arguments[0] ? document.querySelector(arguments[0]) !== null : false
+];
+"""
+
+# Upper bound on scroll steps, and how long to wait for a step to load new items
+MAX_SCROLLS = 200
+SCROLL_WAIT_TIMEOUT = 5
+
+
+def scroll_until_cutoff(driver, cutoff_time=None, known_item_selector=None, max_scrolls=MAX_SCROLLS, wait_timeout=SCROLL_WAIT_TIMEOUT):
+    """
+    滚动无限加载的列表页，直到最早加载的条目早于截止时间、出现已知条目或不再加载新条目为止。
+    
+    每次滚动后等待新条目出现（而非固定休眠），并检查已加载条目中最早的发布时间。
+    
+    Args:
+        driver：已加载列表页的 WebDriver。
+        cutoff_time (datetime, 可选)：截止时间，如果为 None，则滚动到不再加载新条目或达到 max_scrolls 为止。
+        known_item_selector (str, 可选)：已知条目的 CSS 选择器，出现时停止滚动（增量模式）。
+        max_scrolls (int, 可选)：最多滚动次数。
+        wait_timeout (float, 可选)：每次滚动后等待新条目出现的最长秒数。
+    Returns:
+        int：实际滚动次数。
+    """
+    cutoff_ms = cutoff_time.timestamp() * 1000 if cutoff_time is not None else None
+    count, oldest, known = driver.execute_script(SCROLL_STATE_SCRIPT, known_item_selector)
+    
+    for scrolls in range(max_scrolls):
+        if known or (cutoff_ms is not None and oldest is not None and oldest < cutoff_ms):
+            return scrolls
+        
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        state = {}
+        
+        def loaded_more(d):
+            state['value'] = d.execute_script(SCROLL_STATE_SCRIPT, known_item_selector)
+            return state['value'][0] > count
+        
+        try:
+            WebDriverWait(driver, wait_timeout, poll_frequency=0.2).until(loaded_more)
+        except TimeoutException:
+            # Nothing new loaded, the end of the listing has been reached
+            return scrolls + 1
+        count, oldest, known = state['value']
+    
+    return max_scrolls
+
+
+def get_news_entries(url='https://wallstreetcn.com/news/global', time_filter=24, incremental=False):
     """
     从指定的 URL 获取新闻条目。
     
     Args:
         url (str, 可选)：要爬取的页面 URL。默认值为 'https://wallstreetcn.com/news/global'。
         time_filter (int, 可选)：如果提供，则仅返回在过去 'time_filter' 小时内发布的新闻条目。默认值为 24 小时。
+        incremental (bool, 可选)：如果为 True，只滚动到上次见过的最新条目为止，并将新条目合并到持久化的时间窗口索引中。默认值为 False。
     Returns:
         list：包含编号，标题，URL的新闻条目列表。
     """
-    # Set up headless Chrome
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-    driver = webdriver.Chrome(options=chrome_options)
+    index = get_listing_index() if incremental else None
+    high_water_id = index.high_water_mark(url, time_filter) if index else None
+    known_item_selector = f'a[href$="/articles/{high_water_id}"]' if high_water_id is not None else None
+    
+    # Calculate the cutoff time if time_filter is provided
+    cutoff_time = None
+    if time_filter is not None:
+        # Use timezone-aware datetime to match the format from the webpage
+        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=time_filter)
+    
+    # Borrow a long-lived headless Chrome from the listing pool
+    pool = get_driver_pool('listing')
+    driver = None
+    broken = False
     
     try:
+        driver = pool.acquire()
+        
         # Load the page
-        driver.get(url)
+        with span('listing_load'):
+            driver.get(url)
         
         # Wait for news links to load (adjust selector based on page structure)
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, 'a[href*="/articles/"]'))
-        )
+        with span('listing_wait'):
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, 'a[href*="/articles/"]'))
+            )
 
         # Scroll to load more content (handle infinite scroll)
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        for _ in range(time_filter//12 + 1):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(3)  # Wait for content to load
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                break
-            last_height = new_height
-
-        # Extract news links
-        news_pattern = r'^https://wallstreetcn\.com/articles/\d+$'
-        news_entries = []
+        with span('scroll'):
+            scroll_until_cutoff(driver, cutoff_time, known_item_selector)
         
-        # Calculate the cutoff time if time_filter is provided
-        cutoff_time = None
-        if time_filter is not None:
-            # Use timezone-aware datetime to match the format from the webpage
-            from datetime import timezone
-            cutoff_time = datetime.now(timezone.utc) - timedelta(hours=time_filter)
-        
-        # Find all anchor tags
-        links = driver.find_elements(By.TAG_NAME, 'a')
-        for link in links:
-            try:
-                href = link.get_attribute('href')
-                if href and re.match(news_pattern, urljoin(url, href)):
-                    # If time_filter is provided, check the publication time
-                    if time_filter is not None:
-                        # Find the time element associated with this link based on the specific structure
-                        # Based on the observed XPath structure, the time element is in a sibling div
-                        time_element = None
-                        try:
-                            # Get the parent div of the link
-                            parent_div = link.find_element(By.XPATH, './ancestor::div[1]')
-                            
-                            # Look for time element in the parent div's children
-                            # First try to find a direct time element
-                            try:
-                                time_element = parent_div.find_element(By.XPATH, './/time')
-                            except:
-                                # If no direct time element, look for elements with time-related classes
-                                try:
-                                    time_element = parent_div.find_element(By.XPATH, './/*[contains(@class, "time") or contains(@class, "date")]')
-                                except:
-                                    # If still not found, try looking in sibling divs
-                                    try:
-                                        # Get the grandparent that contains both the link div and time div
-                                        grandparent = parent_div.find_element(By.XPATH, './parent::*')
-                                        # Look for time elements in other child divs
-                                        time_element = grandparent.find_element(By.XPATH, './/div[2]//time | .//div[contains(@class, "time") or contains(@class, "date")]')
-                                    except:
-                                        pass
-                            
-                            # If still no time element, check text content for time patterns
-                            if not time_element:
-                                try:
-                                    # Check the parent div's text for time patterns
-                                    text_content = parent_div.text
-                                    if re.search(r'\d+\s+(minute|hour|day|week)s?\s+ago|today at', text_content, re.IGNORECASE):
-                                        time_element = parent_div
-                                except:
-                                    pass
-                        except Exception as e:
-                            print(f"Error finding time element: {e}")
-                        
-                        # If we found a time element, check if it's within our time filter
-                        if time_element:
-                            # Extract the datetime directly from the datetime attribute
-                            try:
-                                # Get the datetime attribute from the time element
-                                datetime_attr = time_element.get_attribute('datetime')
-                                if datetime_attr:
-                                    # Parse the ISO format datetime
-                                    # Example format: "2025-04-22T21:22:54.000+08:00"
-                                    post_time = datetime.fromisoformat(datetime_attr)
-                                    
-                                    # If we could parse the time and it's older than our cutoff, skip this link
-                                    if post_time and cutoff_time:
-                                        # Convert post_time to UTC for consistent comparison
-                                        from datetime import timezone
-                                        post_time_utc = post_time.astimezone(timezone.utc)
-                                        if post_time_utc < cutoff_time:
-                                            continue
-                                else:
-                                    # Fallback if datetime attribute is not available
-                                    print(f"No datetime attribute found for time element: {time_element.text}")
-                            except Exception as e:
-                                print(f"Error parsing datetime: {e}")
-                    
-                    # If we passed the time filter check or no time filter was specified
-                    full_url = urljoin(url, href)
-                    
-                    # Extract the title from the link text or from a child element
-                    title = ""
-                    try:
-                        # First try to get the text directly from the link
-                        title = link.text.strip()
-                        
-                        # If the link text is empty, try to find a title element within the link
-                        if not title:
-                            title_element = link.find_element(By.XPATH, './/*[contains(@class, "title") or self::h1 or self::h2 or self::h3 or self::h4]')
-                            title = title_element.text.strip()
-                            
-                        # If still no title, try to find any text content in the link
-                        if not title:
-                            title = link.get_attribute('textContent').strip()
-                            
-                        # If still no title, use the URL as a fallback
-                        if not title:
-                            title = "Article " + href.split('/')[-1]
-                    except Exception as e:
-                        print(f"Error extracting title: {e}")
-                        title = "Article " + href.split('/')[-1]  # Use article ID as fallback title
-                    
-                    # Add the entry to our list with an ID based on the current position
-                    news_entries.append({
-                        # ID starts at 1 rather than 0
-                        "ID": len(news_entries)+1,
-                        "Title": title,
-                        "URL": full_url
-                    })
-            except Exception as e:
-                # Print the specific error for debugging
-                print(f"Error processing link: {e}")
-                continue
+        # Grab the rendered page once and extract every entry locally
+        with span('listing_extract'):
+            news_entries = extract_news_entries(driver.page_source, url, cutoff_time)
         
+        if index is not None:
+            index.merge(url, news_entries, covered_hours=None if high_water_id is not None else time_filter)
+            return index.window(url, time_filter)
         return news_entries
     
     except Exception as e:
-        print(f"Error crawling the page: {e}")
+        print(f"Error crawling the page: {e}", file=sys.stderr)
+        broken = True
         return []
     
     finally:
-        driver.quit()
+        if driver is not None:
+            pool.release(driver, broken)
+
+
+
+def channel_from_url(url):
+    """将 'https://wallstreetcn.com/news/global' 形式的列表页 URL 转换为接口频道名 'global-channel'。"""
+    return urlparse(url).path.rstrip('/').split('/')[-1] + '-channel'
+
+
+def collect_feed_items(data, news_entries, seen_ids, cutoff_time=None, high_water_id=None):
+    """
+    将一页信息流接口数据中的文章追加到 news_entries 中。
+    
+    Args:
+        data (dict)：接口返回的 'data' 字段。
+        news_entries (list)：用于追加新闻条目的列表。
+        seen_ids (set)：已收录的文章编号，用于跨页去重。
+        cutoff_time (datetime, 可选)：早于该时间的条目将结束翻页。
+        high_water_id (int, 可选)：不大于该编号的已知条目将结束翻页。
+    Returns:
+        bool：如果已到达截止时间或已知条目，返回 True。
+    """
+    for item in data.get('items') or []:
+        if item.get('resource_type') != 'article':
+            continue
+        resource = item.get('resource') or {}
+        article_id = resource.get('id')
+        if article_id is None or article_id in seen_ids:
+            continue
+        
+        post_time = datetime.fromtimestamp(resource.get('display_time', 0), tz=CST)
+        
+        # Items come newest first, so the first older or already-known item ends the listing
+        if cutoff_time and post_time < cutoff_time:
+            return True
+        if high_water_id is not None and int(article_id) <= high_water_id:
+            return True
+        
+        seen_ids.add(article_id)
+        news_entries.append({
+            "ID": len(news_entries)+1,
+            "Title": resource.get('title') or f"Article {article_id}",
+            "URL": resource.get('uri') or f"https://wallstreetcn.com/articles/{article_id}",
+            "Time": post_time.isoformat()
+        })
+    return False
+
+
+def feed_params(url, limit=20):
+    """构造信息流接口的首页请求参数。"""
+    return {
+        'channel': channel_from_url(url),
+        'accept': 'article',
+        'cursor': '',
+        'limit': limit,
+        'action': 'upglide',
+    }
+
+
+def get_news_entries_from_feed(url='https://wallstreetcn.com/news/global', time_filter=24, limit=20, api_url=FEED_API_URL, max_pages=100, incremental=False):
+    """
+    通过网站底层的 JSON 信息流接口（游标分页）获取新闻条目，无需启动浏览器。
+    
+    Args:
+        url (str, 可选)：对应的新闻列表页 URL，用于确定频道。默认值为 'https://wallstreetcn.com/news/global'。
+        time_filter (int, 可选)：如果提供，则仅返回在过去 'time_filter' 小时内发布的新闻条目。默认值为 24 小时。
+        limit (int, 可选)：每页请求的条目数。默认值为 20。
+        api_url (str, 可选)：信息流接口地址，可指向本地的 fixture 服务以便离线测试。
+        max_pages (int, 可选)：最多翻页次数。默认值为 100。
+        incremental (bool, 可选)：如果为 True，只翻页到上次见过的最新条目为止，并将新条目合并到持久化的时间窗口索引中。默认值为 False。
+    Returns:
+        list：包含编号，标题，URL，发布时间的新闻条目列表。
+    """
+    index = get_listing_index() if incremental else None
+    high_water_id = index.high_water_mark(url, time_filter) if index else None
+    
+    cutoff_time = None
+    if time_filter is not None:
+        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=time_filter)
+    
+    params = feed_params(url, limit)
+    news_entries = []
+    seen_ids = set()
+    
+    try:
+        for _ in range(max_pages):
+            payload = fetch_json(api_url, params=params)
+            data = payload.get('data') or {}
+            
+            reached_cutoff = collect_feed_items(data, news_entries, seen_ids, cutoff_time, high_water_id)
+            
+            next_cursor = data.get('next_cursor')
+            if reached_cutoff or not next_cursor or next_cursor == params['cursor']:
+                break
+            params['cursor'] = next_cursor
+    
+    except Exception as e:
+        print(f"Error fetching the news feed: {e}", file=sys.stderr)
+        # A partial crawl must not advance the high-water mark past missing items
+        return news_entries
+    
+    if index is not None:
+        index.merge(url, news_entries, covered_hours=None if high_water_id is not None else time_filter)
+        return index.window(url, time_filter)
+    return news_entries
+
+
+def channel_url(channel, base_url=NEWS_BASE_URL):
+    """将频道名（如 'china'）转换为列表页 URL（如 'https://wallstreetcn.com/news/china'）。"""
+    return f"{base_url.rstrip('/')}/news/{channel}"
+
+
+def _entry_sort_key(entry):
+    # Newest first by publish time, falling back to the (increasing) article ID
+    published_at = entry.get("Time")
+    timestamp = datetime.fromisoformat(published_at).timestamp() if published_at else 0
+    article_id = article_id_from_url(entry["URL"])
+    return timestamp, int(article_id) if article_id.isdigit() else 0
+
+
+def merge_channel_entries(channel_entries):
+    """
+    合并多个频道的新闻条目：按文章编号去重，标注所属频道，并按发布时间从新到旧排序。
+    
+    Args:
+        channel_entries (dict)：频道名到该频道新闻条目列表的映射，按频道优先级排列。
+    Returns:
+        list：包含编号，标题，URL，发布时间（如有）及所属频道 'Channels' 的新闻条目列表。
+    """
+    merged = {}
+    for channel, entries in channel_entries.items():
+        for entry in entries:
+            article_id = article_id_from_url(entry["URL"])
+            existing = merged.get(article_id)
+            if existing is None:
+                merged[article_id] = existing = {key: value for key, value in entry.items() if key != "ID"}
+                existing["Channels"] = []
+            elif "Time" not in existing and entry.get("Time"):
+                existing["Time"] = entry["Time"]
+            if channel not in existing["Channels"]:
+                existing["Channels"].append(channel)
+    
+    # ID starts at 1 rather than 0
+    ordered = sorted(merged.values(), key=_entry_sort_key, reverse=True)
+    return [{"ID": i+1, **entry} for i, entry in enumerate(ordered)]
+
+
+def get_multi_channel_news_entries(channels=NEWS_CHANNELS, time_filter=24, engine='browser', incremental=False, base_url=NEWS_BASE_URL, api_url=FEED_API_URL, max_workers=None):
+    """
+    并发爬取多个频道的列表页，并返回按文章编号去重、按发布时间排序的合并结果。
+    
+    'browser' 引擎的各频道共享列表浏览器池（并发数受池大小限制），'feed' 引擎共享同一个 HTTP 连接池。
+    
+    Args:
+        channels (list, 可选)：频道名列表，如 ['global', 'china']。默认值为 NEWS_CHANNELS。
+        time_filter (int, 可选)：如果提供，则仅返回在过去 'time_filter' 小时内发布的新闻条目。默认值为 24 小时。
+        engine (str, 可选)：列表引擎，'browser' 或 'feed'。默认值为 'browser'。
+        incremental (bool, 可选)：如果为 True，每个频道仅抓取上次之后的新条目并与持久化的时间窗口合并。默认值为 False。
+        base_url (str, 可选)：站点地址，频道列表页为 '<base_url>/news/<channel>'。
+        api_url (str, 可选)：'feed' 引擎使用的信息流接口地址。
+        max_workers (int, 可选)：最多同时爬取的频道数。默认为频道数。
+    Returns:
+        list：包含编号，标题，URL，发布时间（如有）及所属频道 'Channels' 的新闻条目列表。
+    """
+    if engine not in LISTING_ENGINES:
+        raise ValueError(f"Unknown listing engine '{engine}', expected one of {LISTING_ENGINES}")
+    channels = list(dict.fromkeys(channels))
+    if not channels:
+        return []
+    
+    def crawl(channel):
+        url = channel_url(channel, base_url)
+        try:
+            if engine == 'feed':
+                return get_news_entries_from_feed(url, time_filter, api_url=api_url, incremental=incremental)
+            return get_news_entries(url, time_filter, incremental=incremental)
+        except Exception as e:
+            # One failing channel must not discard the others' entries
+            print(f"Error crawling channel '{channel}': {e!r}", file=sys.stderr)
+            return []
+    
+    with ThreadPoolExecutor(max_workers=max_workers or len(channels), thread_name_prefix='wscn-channel') as executor:
+        results = list(executor.map(crawl, channels))
+    return merge_channel_entries(dict(zip(channels, results)))
 
 
 # news_entries is a list of python dict(s). wrap it in braces to have a JSON file
@@ -181,7 +445,7 @@ def wrap_in_braces(s):
     return "{" + s[1:-1] + "}" if len(s) > 1 else "{}}"
 
 
-def get_news_entries_as_json(url='https://wallstreetcn.com/news/global', time_filter=24, indent=0):
+def get_news_entries_as_json(url='https://wallstreetcn.com/news/global', time_filter=24, indent=0, engine='browser', incremental=False, channels=None, dedup=False, archive_writer=None):
     """
     从指定的 URL 获取新闻条目，并返回 JSON 字符串。
     
@@ -189,11 +453,31 @@ def get_news_entries_as_json(url='https://wallstreetcn.com/news/global', time_fi
         url (str, 可选)：要爬取的页面 URL。默认值为 'https://wallstreetcn.com/news/global'。
         time_filter (int, 可选)：如果提供，则仅返回在过去 'time_filter' 小时内发布的新闻条目。默认值为 24 小时。
         indent (int, 可选)：JSON 字符串的缩进。默认值为 0。
+        engine (str, 可选)：列表引擎，'browser' 为滚动抓取页面，'feed' 为直接分页请求 JSON 接口。默认值为 'browser'。
+        incremental (bool, 可选)：如果为 True，仅抓取上次之后的新条目并与持久化的时间窗口合并。默认值为 False。
+        channels (list, 可选)：如果提供，则忽略 url，并发爬取这些频道并返回带频道标注的合并结果。
+        dedup (bool, 可选)：如果为 True，按标题相似度合并重复或转载的条目，仅保留最新的一条并在 'Duplicates' 中列出其余 URL。默认值为 False。
+        archive_writer (ArchiveWriter, 可选)：如果提供，将返回的条目中此前未归档的条目追加写入按发布日期分区的归档，重复轮询同一时间窗口不会重复写入。
     Returns:
         str：包含编号，标题，URL的新闻条目 JSON 字符串。
     """
-    print(f"Crawling news entries from {url}")
-    news_entries = get_news_entries(url, time_filter)
+    if engine not in LISTING_ENGINES:
+        raise ValueError(f"Unknown listing engine '{engine}', expected one of {LISTING_ENGINES}")
+    
+    if channels:
+        print(f"Crawling news entries from channels {', '.join(channels)} ({engine})")
+        news_entries = get_multi_channel_news_entries(channels, time_filter, engine=engine, incremental=incremental)
+    elif engine == 'feed':
+        print(f"Crawling news entries from {url} ({engine})")
+        news_entries = get_news_entries_from_feed(url, time_filter, incremental=incremental)
+    else:
+        print(f"Crawling news entries from {url} ({engine})")
+        news_entries = get_news_entries(url, time_filter, incremental=incremental)
+    
+    if dedup:
+        news_entries, _ = dedup_entries(news_entries)
+    if archive_writer is not None:
+        archive_writer.write_new_entries(news_entries)
 
     return wrap_in_braces(json.dumps(news_entries, indent=indent, ensure_ascii=False))
 
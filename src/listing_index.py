@@ -0,0 +1,184 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from src.article_cache import DEFAULT_CACHE_PATH, article_id_from_url
+
+
+DEFAULT_INDEX_PATH = os.environ.get(
+    'WSCN_LISTING_INDEX_PATH',
+    os.path.join(os.path.dirname(DEFAULT_CACHE_PATH), 'listings.sqlite3')
+)
+
+# Entries older than this are pruned from the persisted window
+DEFAULT_RETENTION_HOURS = int(os.environ.get('WSCN_LISTING_RETENTION_HOURS', 72))
+
+
+class ListingIndex:
+    """
+    Persisted window of listing entries per listing URL.
+
+    Tracks the newest article ID seen (the high-water mark) and how far back
+    the stored window reaches, so repeated listings only need to fetch items
+    newer than the mark. Entries without a publish time age by the time they
+    were first seen.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, retention_hours: float = DEFAULT_RETENTION_HOURS):
+        self.path = path
+        self.retention_hours = retention_hours
+        self._lock = threading.Lock()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS listings ('
+            ' listing_url TEXT PRIMARY KEY,'
+            ' high_water_id INTEGER,'
+            ' covered_since REAL NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' listing_url TEXT NOT NULL,'
+            ' article_id INTEGER NOT NULL,'
+            ' title TEXT NOT NULL,'
+            ' url TEXT NOT NULL,'
+            ' published_at TEXT,'
+            ' seen_at REAL NOT NULL,'
+            ' age_key REAL NOT NULL,'
+            ' PRIMARY KEY (listing_url, article_id))'
+        )
+
+    def high_water_mark(self, listing_url: str, time_filter: float = None):
+        """
+        Return the newest article ID seen for a listing, or None when the stored
+        window does not reach back far enough to serve 'time_filter' hours.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT high_water_id, covered_since FROM listings WHERE listing_url = ?',
+                (listing_url,)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        if time_filter is not None and row[1] > time.time() - time_filter * 3600:
+            return None
+        return row[0]
+
+    def merge(self, listing_url: str, entries: list, covered_hours: float = None, prune: bool = True) -> list:
+        """
+        Merge freshly listed entries into the window and prune it by age.
+
+        Args:
+            listing_url (str): Listing page the entries came from
+            entries (list): Entries with 'Title', 'URL' and optionally 'Time'
+            covered_hours (float): Set when the entries come from a complete crawl
+                of the past 'covered_hours' hours, extending the window's coverage
+            prune (bool): Drop entries older than the retention period; False keeps
+                every entry, e.g. for a ledger of entries already archived
+
+        Returns:
+            list: The entries that were not in the window before
+        """
+        now = time.time()
+        added = []
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                for entry in entries:
+                    article_id = article_id_from_url(entry["URL"])
+                    if not article_id.isdigit():
+                        continue
+                    published_at = entry.get("Time")
+                    age_key = datetime.fromisoformat(published_at).timestamp() if published_at else now
+                    cursor = self._conn.execute(
+                        'INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (listing_url, int(article_id), entry["Title"], entry["URL"], published_at, now, age_key)
+                    )
+                    if cursor.rowcount:
+                        added.append(entry)
+
+                retention_start = now - self.retention_hours * 3600 if prune else 0
+                self._conn.execute(
+                    'DELETE FROM entries WHERE listing_url = ? AND age_key < ?',
+                    (listing_url, retention_start)
+                )
+
+                row = self._conn.execute(
+                    'SELECT high_water_id, covered_since FROM listings WHERE listing_url = ?',
+                    (listing_url,)
+                ).fetchone()
+                covered_since = row[1] if row else now
+                if covered_hours is not None:
+                    covered_since = min(covered_since, now - covered_hours * 3600)
+                covered_since = max(covered_since, retention_start)
+                high_water_id = self._conn.execute(
+                    'SELECT MAX(article_id) FROM entries WHERE listing_url = ?',
+                    (listing_url,)
+                ).fetchone()[0]
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO listings VALUES (?, ?, ?)',
+                    (listing_url, high_water_id, covered_since)
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return added
+
+    def unseen(self, listing_url: str, entries: list) -> list:
+        """Entries not in the window yet, without adding them; entries without an article ID are left out"""
+        ids = {}
+        for entry in entries:
+            article_id = article_id_from_url(entry["URL"])
+            if article_id.isdigit():
+                ids.setdefault(int(article_id), entry)
+        if not ids:
+            return []
+        with self._lock:
+            known = {row[0] for row in self._conn.execute(
+                f'SELECT article_id FROM entries WHERE listing_url = ? AND article_id IN ({",".join("?" * len(ids))})',
+                (listing_url, *ids)
+            )}
+        return [entry for article_id, entry in ids.items() if article_id not in known]
+
+    def window(self, listing_url: str, time_filter: float = None) -> list:
+        """Return the stored entries of the past 'time_filter' hours, newest first"""
+        since = time.time() - time_filter * 3600 if time_filter is not None else 0
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT title, url, published_at FROM entries'
+                ' WHERE listing_url = ? AND age_key >= ? ORDER BY article_id DESC',
+                (listing_url, since)
+            ).fetchall()
+
+        news_entries = []
+        for title, url, published_at in rows:
+            entry = {"ID": len(news_entries)+1, "Title": title, "URL": url}
+            if published_at:
+                entry["Time"] = published_at
+            news_entries.append(entry)
+        return news_entries
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Process-wide default index, created on first use
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_listing_index() -> ListingIndex:
+    """Get or create the process-wide listing index"""
+    global _default_index
+    if _default_index is None:
+        with _default_index_lock:
+            if _default_index is None:
+                _default_index = ListingIndex()
+    return _default_index
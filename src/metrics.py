@@ -0,0 +1,185 @@
+"""
+Lightweight per-stage timing spans and counters for the scraping hot paths.
+
+Disabled by default; enable with WSCN_METRICS=1 or enable_metrics(). While
+disabled, span() returns a shared no-op context manager and incr() returns
+immediately, so instrumented code pays a single flag check.
+"""
+
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+METRICS_FILE = os.environ.get('WSCN_METRICS_FILE')
+
+_enabled = os.environ.get('WSCN_METRICS', '').lower() not in ('', '0', 'false', 'no') or bool(METRICS_FILE)
+_lock = threading.Lock()
+_stage_count = defaultdict(int)
+_stage_sum = defaultdict(float)
+_stage_max = defaultdict(float)
+_counters = defaultdict(float)
+
+# Per-result timings collector, set by collect_timings()
+_current_timings = contextvars.ContextVar('wscn_timings', default=None)
+
+_NULL_SPAN = nullcontext()
+
+
+def enable_metrics(enabled: bool = True):
+    global _enabled
+    _enabled = enabled
+
+
+def metrics_enabled() -> bool:
+    return _enabled
+
+
+def _record(name: str, elapsed: float):
+    with _lock:
+        _stage_count[name] += 1
+        _stage_sum[name] += elapsed
+        if elapsed > _stage_max[name]:
+            _stage_max[name] = elapsed
+    timings = _current_timings.get()
+    if timings is not None:
+        timings[name] = round(timings.get(name, 0.0) + elapsed * 1000, 3)
+
+
+class _Span:
+    __slots__ = ('name', 'started')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def span(name: str):
+    """Context manager timing one stage, e.g. with span('http_fetch'): ..."""
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def incr(name: str, value: float = 1):
+    """Increment a counter such as 'fetch_bytes', 'cache_hits', 'retries' or 'timeouts'"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] += value
+
+
+@contextmanager
+def collect_timings():
+    """
+    Collect the stage timings (in ms) recorded in this context into a dict
+
+    Yields None while metrics are disabled.
+    """
+    if not _enabled:
+        yield None
+        return
+    timings = {}
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def snapshot() -> dict:
+    """Return a copy of all stage statistics and counters"""
+    with _lock:
+        return {
+            "stages": {
+                name: {"count": _stage_count[name], "sum_s": _stage_sum[name], "max_s": _stage_max[name]}
+                for name in _stage_count
+            },
+            "counters": dict(_counters),
+        }
+
+
+def reset_metrics():
+    with _lock:
+        _stage_count.clear()
+        _stage_sum.clear()
+        _stage_max.clear()
+        _counters.clear()
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process in bytes, or None where it cannot be read"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def render_prometheus() -> str:
+    """Render the current metrics in the Prometheus text exposition format"""
+    data = snapshot()
+    lines = [
+        '# HELP wscn_stage_duration_seconds Time spent per scraping stage.',
+        '# TYPE wscn_stage_duration_seconds summary',
+    ]
+    for name, stage in sorted(data["stages"].items()):
+        lines.append(f'wscn_stage_duration_seconds_sum{{stage="{name}"}} {stage["sum_s"]:.6f}')
+        lines.append(f'wscn_stage_duration_seconds_count{{stage="{name}"}} {stage["count"]}')
+    lines.append('# HELP wscn_stage_duration_seconds_max Longest single duration per scraping stage.')
+    lines.append('# TYPE wscn_stage_duration_seconds_max gauge')
+    for name, stage in sorted(data["stages"].items()):
+        lines.append(f'wscn_stage_duration_seconds_max{{stage="{name}"}} {stage["max_s"]:.6f}')
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f'# TYPE wscn_{name}_total counter')
+        lines.append(f'wscn_{name}_total {value:g}')
+    peak_rss = peak_rss_bytes()
+    if peak_rss is not None:
+        lines.append('# HELP wscn_peak_rss_bytes Peak resident set size of the process.')
+        lines.append('# TYPE wscn_peak_rss_bytes gauge')
+        lines.append(f'wscn_peak_rss_bytes {peak_rss}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_metrics_file(path: str = None):
+    """Atomically write the Prometheus text to 'path' (default: WSCN_METRICS_FILE), if set"""
+    path = path or METRICS_FILE
+    if not path or not _enabled:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def start_metrics_file_writer(interval: float = 15.0, path: str = None):
+    """Rewrite the metrics file every 'interval' seconds on a daemon thread, if a path is configured"""
+    path = path or METRICS_FILE
+    if not path or not _enabled:
+        return None
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                write_metrics_file(path)
+            except OSError as e:
+                print(f"Error writing metrics file: {e}", file=sys.stderr)
+
+    thread = threading.Thread(target=run, name='metrics-file-writer', daemon=True)
+    thread.start()
+    return thread
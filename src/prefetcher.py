@@ -0,0 +1,133 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+from src.archive import ArchiveWriter
+from src.article_cache import ArticleCache, article_id_from_url, get_article_cache
+from src.async_news import aget_multi_channel_news_entries, aget_news_data
+from src.fetch_backend import aclose_async_http_client
+from src.get_news_list import FEED_API_URL, NEWS_BASE_URL
+from src.metrics import incr, span
+from src.search_index import SearchIndex
+
+
+DEFAULT_INTERVAL = float(os.environ.get('WSCN_PREFETCH_INTERVAL', 300))
+DEFAULT_CHANNELS = tuple(
+    channel.strip() for channel in os.environ.get('WSCN_PREFETCH_CHANNELS', 'global').split(',') if channel.strip()
+)
+DEFAULT_ENGINE = os.environ.get('WSCN_PREFETCH_ENGINE', 'feed')
+DEFAULT_TIME_FILTER = int(os.environ.get('WSCN_PREFETCH_TIME_FILTER', 24))
+DEFAULT_CONCURRENCY = int(os.environ.get('WSCN_PREFETCH_CONCURRENCY', 3))
+# Politeness budget: requests per second to the site, and articles fetched per cycle
+DEFAULT_RATE = float(os.environ.get('WSCN_PREFETCH_RATE', 1.0))
+DEFAULT_MAX_PER_CYCLE = int(os.environ.get('WSCN_PREFETCH_MAX_PER_CYCLE', 50))
+
+
+def prefetch_enabled() -> bool:
+    return os.environ.get('WSCN_PREFETCH', '').lower() not in ('', '0', 'false', 'no')
+
+
+class Prefetcher:
+    """
+    Background scheduler that keeps the article cache warm.
+
+    Every 'interval' seconds it lists the configured channels and scrapes the
+    articles that have no fresh cache entry yet, newest first, within the
+    concurrency and politeness budget, archiving them if given an archive writer.
+    Content requests for those URLs are then served from the cache.
+    """
+
+    def __init__(self, cache: ArticleCache = None, search_index: SearchIndex = None, archive_writer: ArchiveWriter = None, channels=DEFAULT_CHANNELS, interval: float = DEFAULT_INTERVAL,
+                 engine: str = DEFAULT_ENGINE, time_filter: int = DEFAULT_TIME_FILTER,
+                 max_concurrency: int = DEFAULT_CONCURRENCY, rate: float = DEFAULT_RATE,
+                 max_per_cycle: int = DEFAULT_MAX_PER_CYCLE, base_url: str = NEWS_BASE_URL, api_url: str = FEED_API_URL):
+        self.cache = cache
+        self.search_index = search_index
+        self.archive_writer = archive_writer
+        self.channels = list(channels)
+        self.interval = interval
+        self.engine = engine
+        self.time_filter = time_filter
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.max_per_cycle = max_per_cycle
+        self.base_url = base_url
+        self.api_url = api_url
+        self.cycles = 0
+        self.prefetched = 0
+        self.failed = 0
+        self.last_run_at = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    async def arun_once(self) -> dict:
+        """List the channels once and prefetch the articles missing from the cache"""
+        cache = self.cache if self.cache is not None else get_article_cache()
+        with span('prefetch_cycle'):
+            entries = await aget_multi_channel_news_entries(
+                self.channels, self.time_filter, engine=self.engine, base_url=self.base_url, api_url=self.api_url
+            )
+            urls = {article_id_from_url(entry["URL"]): entry["URL"] for entry in entries}
+            missing = cache.missing(list(urls))[:self.max_per_cycle]
+            articles = await aget_news_data(
+                [urls[article_id] for article_id in missing],
+                max_concurrency=self.max_concurrency, cache=cache, rate=self.rate,
+                search_index=self.search_index
+            )
+            if self.archive_writer is not None:
+                # Articles served from the cache later were archived here when first fetched
+                await asyncio.to_thread(self._archive, articles)
+
+        fetched = sum(1 for article in articles if article.ok)
+        self.cycles += 1
+        self.prefetched += fetched
+        self.failed += len(articles) - fetched
+        self.last_run_at = time.time()
+        incr('prefetched', fetched)
+        return {"listed": len(urls), "missing": len(missing), "prefetched": fetched}
+
+    def _archive(self, articles):
+        # Flushed at once: the cache hits these articles become are never archived again
+        self.archive_writer.write_many([article for article in articles if article.ok and not article.from_cache])
+        self.archive_writer.flush()
+
+    def run_once(self) -> dict:
+        """Run one prefetch cycle on a private event loop"""
+        async def cycle():
+            try:
+                return await self.arun_once()
+            finally:
+                await aclose_async_http_client()
+        return asyncio.run(cycle())
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error prefetching articles: {e}", file=sys.stderr)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start the scheduler on a daemon thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='article-prefetcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None):
+        """Stop scheduling new cycles and wait up to 'timeout' seconds for the current one"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "cycles": self.cycles,
+            "prefetched": self.prefetched,
+            "failed": self.failed,
+            "last_run_at": self.last_run_at,
+        }
@@ -0,0 +1,241 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, List
+
+from src.article import Article
+from src.article_cache import DEFAULT_CACHE_PATH
+from src.metrics import incr, span
+
+
+DEFAULT_INDEX_PATH = os.environ.get(
+    'WSCN_SEARCH_INDEX_PATH',
+    os.path.join(os.path.dirname(DEFAULT_CACHE_PATH), 'search.sqlite3')
+)
+
+# Runs of CJK ideographs, and runs of latin letters/digits
+TOKEN_PATTERN = re.compile(r'[㐀-䶿一-鿿豈-﫿]+|[a-z0-9]+')
+
+# Title matches weigh more than body matches in the BM25 score
+TITLE_WEIGHT = 3.0
+CONTENT_WEIGHT = 1.0
+SNIPPET_CHARS = 120
+
+# Version of the indexed token scheme; older indexes are rebuilt on open
+INDEX_VERSION = 1
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into search tokens: overlapping bigrams for Chinese (a lone
+    ideograph stays a unigram) and lowercased words for everything else.
+    """
+    tokens = []
+    for run in TOKEN_PATTERN.findall(text.lower()):
+        if run[0].isascii():
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def index_tokens(text: str) -> List[str]:
+    """
+    tokenize() plus the last ideograph of every Chinese run as a unigram, so
+    that each ideograph starts some indexed token and a one-character query
+    can be answered as a prefix match
+    """
+    tokens = tokenize(text)
+    tokens.extend(run[-1] for run in TOKEN_PATTERN.findall(text.lower()) if not run[0].isascii() and len(run) > 1)
+    return tokens
+
+
+def _match_expression(tokens: List[str]) -> str:
+    """FTS5 query requiring every token, with single ideographs matched as prefixes of the indexed bigrams"""
+    return ' '.join(f'"{token}"*' if len(token) == 1 and not token.isascii() else f'"{token}"' for token in tokens)
+
+
+def _timestamp(published_at: str, default: float) -> float:
+    try:
+        return datetime.fromisoformat(published_at).timestamp()
+    except (TypeError, ValueError):
+        return default
+
+
+def _snippet(content: str, terms: List[str]) -> str:
+    """Excerpt of the content around the first query term found, else its lead"""
+    lowered = content.lower()
+    positions = [pos for pos in (lowered.find(term) for term in terms) if pos >= 0]
+    start = max(0, min(positions) - SNIPPET_CHARS // 4) if positions else 0
+    excerpt = content[start:start + SNIPPET_CHARS].strip()
+    return ('…' if start else '') + excerpt + ('…' if start + SNIPPET_CHARS < len(content) else '')
+
+
+class SearchIndex:
+    """
+    Full-text index over scraped articles, backed by SQLite FTS5.
+
+    Text is pre-tokenised with index_tokens() so Chinese is matched by bigrams
+    (single characters by prefix), and results are ranked with FTS5's BM25.
+    Queries never touch the network.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS documents ('
+            ' doc_id INTEGER PRIMARY KEY,'
+            ' article_id TEXT NOT NULL UNIQUE,'
+            ' url TEXT NOT NULL,'
+            ' title TEXT NOT NULL,'
+            ' published_at TEXT,'
+            ' published_ts REAL NOT NULL,'
+            ' content TEXT NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS documents_published_ts ON documents (published_ts)')
+        self._conn.execute('CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(title, content)')
+        if self._conn.execute('PRAGMA user_version').fetchone()[0] < INDEX_VERSION:
+            self._reindex()
+
+    def _reindex(self):
+        """Rebuild the full-text rows from the stored documents, e.g. after the indexed tokens changed"""
+        with span('index'), self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.execute('DELETE FROM documents_fts')
+                for doc_id, title, content in self._conn.execute('SELECT doc_id, title, content FROM documents').fetchall():
+                    self._conn.execute(
+                        'INSERT INTO documents_fts (rowid, title, content) VALUES (?, ?, ?)',
+                        (doc_id, ' '.join(index_tokens(title)), ' '.join(index_tokens(content)))
+                    )
+                self._conn.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def add(self, article: Article) -> bool:
+        """Index one successfully scraped article, replacing an earlier version of it"""
+        if not article.ok:
+            return False
+        self.add_many([article])
+        return True
+
+    def add_many(self, articles: Iterable[Article]) -> int:
+        """Index a batch of articles in one transaction, skipping failed scrapes"""
+        now = time.time()
+        added = 0
+        with span('index'), self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                for article in articles:
+                    if not article.ok:
+                        continue
+                    row = self._conn.execute(
+                        'SELECT doc_id FROM documents WHERE article_id = ?', (article.id,)
+                    ).fetchone()
+                    if row is not None:
+                        self._conn.execute('DELETE FROM documents_fts WHERE rowid = ?', (row[0],))
+                        self._conn.execute('DELETE FROM documents WHERE doc_id = ?', (row[0],))
+                    cursor = self._conn.execute(
+                        'INSERT INTO documents (article_id, url, title, published_at, published_ts, content)'
+                        ' VALUES (?, ?, ?, ?, ?, ?)',
+                        (article.id, article.url, article.title, article.published_at,
+                         _timestamp(article.published_at, now), article.content)
+                    )
+                    self._conn.execute(
+                        'INSERT INTO documents_fts (rowid, title, content) VALUES (?, ?, ?)',
+                        (cursor.lastrowid, ' '.join(index_tokens(article.title)), ' '.join(index_tokens(article.content)))
+                    )
+                    added += 1
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        incr('indexed_articles', added)
+        return added
+
+    def search(self, query: str, hours: float = None, k: int = 10, since: float = None, until: float = None) -> List[dict]:
+        """
+        Rank indexed articles against a query with BM25.
+
+        Args:
+            query (str): Search text; every token must match
+            hours (float): Only articles published in the past 'hours' hours
+            k (int): Maximum number of results
+            since (float): Only articles published at or after this epoch time
+            until (float): Only articles published before this epoch time
+
+        Returns:
+            List[dict]: id, url, title, published_at, score (higher is better) and snippet
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or k <= 0:
+            return []
+        if hours is not None:
+            since = max(since or 0, time.time() - hours * 3600)
+
+        match = _match_expression(tokens)
+        with span('search'), self._lock:
+            rows = self._conn.execute(
+                'SELECT d.article_id, d.url, d.title, d.published_at, d.content,'
+                f' bm25(documents_fts, {TITLE_WEIGHT}, {CONTENT_WEIGHT}) AS rank'
+                ' FROM documents_fts JOIN documents d ON d.doc_id = documents_fts.rowid'
+                ' WHERE documents_fts MATCH ? AND d.published_ts >= ? AND d.published_ts < ?'
+                ' ORDER BY rank LIMIT ?',
+                (match, since or 0, until if until is not None else float('inf'), k)
+            ).fetchall()
+
+        terms = [term for term in query.lower().split() if term]
+        return [
+            {
+                "id": article_id,
+                "url": url,
+                "title": title,
+                "published_at": published_at,
+                # FTS5 reports BM25 negated so that smaller sorts first
+                "score": round(-rank, 4),
+                "snippet": _snippet(content, terms),
+            }
+            for article_id, url, title, published_at, content, rank in rows
+        ]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM documents_fts')
+            self._conn.execute('DELETE FROM documents')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Process-wide default index, created on first use
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """Get or create the process-wide search index"""
+    global _default_index
+    if _default_index is None:
+        with _default_index_lock:
+            if _default_index is None:
+                _default_index = SearchIndex()
+    return _default_index
@@ -0,0 +1,84 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Awaitable, Callable, Hashable
+
+from src.metrics import incr
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the work; callers arriving while it is in
+    flight wait for its result instead of repeating it. Threads and event
+    loops share the same registry, so a sync scrape and an async one for the
+    same article coalesce too. Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key):
+        """Return the in-flight future for 'key' and whether the caller leads it"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                incr('coalesced')
+                return future, False
+            future = self._calls[key] = concurrent.futures.Future()
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is None:
+            future.set_result(result)
+        else:
+            # Waiters see a cancelled call and retry it themselves
+            future.cancel()
+
+    def do(self, key: Hashable, fn: Callable, timeout: float = None):
+        """
+        Run fn() unless a call with the same key is in flight, else wait for that call's result
+
+        Raises TimeoutError if a waiter's 'timeout' passes first.
+        """
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                try:
+                    result = fn()
+                except BaseException as e:
+                    self._finish(key, future, error=e)
+                    raise
+                self._finish(key, future, result)
+                return result
+            try:
+                return future.result(timeout)
+            except concurrent.futures.CancelledError:
+                continue
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable], timeout: float = None):
+        """Async counterpart of do(); fn() returns the awaitable to run"""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                try:
+                    result = await fn()
+                except BaseException as e:
+                    self._finish(key, future, error=e)
+                    raise
+                self._finish(key, future, result)
+                return result
+            try:
+                # Shielded so a waiter that gives up does not cancel the call for everyone else
+                return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+    def __len__(self):
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,123 @@
+import io
+import os
+import tempfile
+import threading
+from typing import Iterator, List
+
+from src.article import Article
+from src.article_cache import ArticleCache
+from src.async_news import aiter_news_data
+from src.get_news_content import iter_news_data
+from src.metrics import incr
+from src.search_index import SearchIndex
+
+
+# Articles scraped at once in memory-bounded batches
+DEFAULT_MAX_IN_FLIGHT = int(os.environ.get('WSCN_MAX_IN_FLIGHT', 5))
+# Batches with more URLs than this are spilled to disk by the MCP content tool
+SPILL_THRESHOLD = int(os.environ.get('WSCN_SPILL_THRESHOLD', 50))
+# Directory for spill files, default the system temporary directory
+SPILL_DIR = os.environ.get('WSCN_SPILL_DIR') or None
+
+
+class SpilledArticles:
+    """
+    Completed articles of a batch, written to an anonymous temporary file as
+    they finish and read back in input order, so a large batch holds only its
+    in-flight articles in memory. The file is deleted on close.
+    """
+
+    def __init__(self, size: int, directory: str = SPILL_DIR):
+        self._file = tempfile.TemporaryFile(dir=directory, prefix='wscn-spill-')
+        self._offsets = [None] * size
+        self._lock = threading.Lock()
+
+    def append(self, index: int, article: Article):
+        """Spill the article requested at input position 'index'"""
+        record = article.to_json().encode('utf-8')
+        with self._lock:
+            offset = self._file.seek(0, io.SEEK_END)
+            self._file.write(record)
+            self._offsets[index] = (offset, len(record))
+        incr('spilled_bytes', len(record))
+
+    def _locations(self):
+        for index, location in enumerate(self._offsets):
+            if location is None:
+                raise ValueError(f"no article was spilled for position {index}")
+            yield location
+
+    def _records(self) -> Iterator[bytes]:
+        for location in self._locations():
+            with self._lock:
+                self._file.seek(location[0])
+                record = self._file.read(location[1])
+            yield record
+
+    def __iter__(self) -> Iterator[Article]:
+        for record in self._records():
+            yield Article.from_json(record)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def write_json(self, fp):
+        """Write the articles as one JSON array to a binary file, as encode_articles would encode them"""
+        fp.write(b'[')
+        for index, record in enumerate(self._records()):
+            if index:
+                fp.write(b',')
+            fp.write(record)
+        fp.write(b']')
+
+    def to_json(self) -> str:
+        # Records are decoded one at a time, so the UTF-8 bytes of the whole array never coexist with the string
+        pieces = ['[']
+        for index, record in enumerate(self._records()):
+            if index:
+                pieces.append(',')
+            pieces.append(record.decode('utf-8'))
+        pieces.append(']')
+        return ''.join(pieces)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def spill_news_data(urls: List[str], max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, backend: str = 'http', cache: ArticleCache = None,
+                    search_index: SearchIndex = None, timeout: float = None, directory: str = SPILL_DIR) -> SpilledArticles:
+    """
+    Memory-bounded get_news_data: at most 'max_in_flight' articles are scraped
+    at once, and each is spilled to disk as soon as it completes
+
+    Returns:
+        SpilledArticles: the articles in input order; close it to delete the spill file
+    """
+    spilled = SpilledArticles(len(urls), directory)
+    try:
+        for index, article in iter_news_data(urls, max_in_flight, backend, cache, search_index, timeout):
+            spilled.append(index, article)
+    except BaseException:
+        spilled.close()
+        raise
+    return spilled
+
+
+async def aspill_news_data(urls: List[str], max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, backend: str = 'http', cache: ArticleCache = None,
+                           rate: float = None, search_index: SearchIndex = None, timeout: float = None, directory: str = SPILL_DIR) -> SpilledArticles:
+    """Async counterpart of spill_news_data"""
+    spilled = SpilledArticles(len(urls), directory)
+    try:
+        async for index, article in aiter_news_data(urls, max_in_flight, backend, cache, rate, search_index, timeout):
+            spilled.append(index, article)
+    except BaseException:
+        spilled.close()
+        raise
+    return spilled